@@ -1,5 +1,59 @@
 import anthropic
-from typing import List, Optional, Dict, Tuple
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, List, Optional, Dict, Tuple
+
+# Worker threads for running the tool_use blocks of one turn side by side; the
+# tools are dominated by ChromaDB/embedding calls, which release the GIL
+_TOOL_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tool")
+
+
+@dataclass(slots=True)
+class ToolResult:
+    """Outcome of one tool_use block, converted to an API content block at the SDK boundary"""
+
+    tool_use_id: str
+    content: Any
+    is_error: bool = False
+
+    def to_block(self) -> Dict[str, Any]:
+        """Return the tool_result content block sent back to Claude"""
+        block = {"type": "tool_result", "tool_use_id": self.tool_use_id, "content": self.content}
+        if self.is_error:
+            block["is_error"] = True
+        return block
+
+
+class _LRUCache:
+    """Small in-process LRU mapping for memoizing generated text"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, str] = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value and mark it as most recently used"""
+        try:
+            self._data.move_to_end(key)
+            return self._data[key]
+        except KeyError:
+            return None
+
+    def put(self, key: str, value: str):
+        """Store a value, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
 
 
 class AIGenerator:
@@ -41,15 +95,57 @@ All responses must be:
 Provide only the direct answer to what was asked.
 """
 
-    def __init__(self, api_key: str, model: str, max_tool_rounds: int = 2):
-        self.client = anthropic.Anthropic(api_key=api_key)
+    # Models that accept the token-efficient tool use beta
+    TOKEN_EFFICIENT_TOOLS_MODELS = ("claude-3-7-sonnet",)
+    TOKEN_EFFICIENT_TOOLS_BETA = "token-efficient-tools-2025-02-19"
+
+    HISTORY_PREFIX = "Previous conversation:\n"
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        max_tool_rounds: int = 2,
+        response_cache_size: int = 512,
+        token_efficient_tools: bool = True,
+    ):
+        # Owned by this generator: an AsyncAnthropic client binds its connection
+        # pool to the event loop it first runs on, so it is never shared module-wide
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, max_retries=2)
         self.model = model
         self.max_tool_rounds = max_tool_rounds
+        self._tool_pool = _TOOL_POOL
+
+        # Answers produced without any tool execution, keyed by request hash
+        self.response_cache = _LRUCache(response_cache_size)
 
         # Pre-build base API parameters
-        self.base_params = {"model": self.model, "temperature": 0, "max_tokens": 800}
+        self.temperature = 0
+        self.max_tokens = 800
+        self.base_params = {
+            "model": self.model,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+        }
+
+        # Static system block marked as a prompt-cache breakpoint so the prompt
+        # (and the tool schemas ahead of it) are served from Anthropic's cache
+        self._system_block = {
+            "type": "text",
+            "text": self.SYSTEM_PROMPT,
+            "cache_control": {"type": "ephemeral"},
+        }
+        # Shared system content for history-free requests (never mutated)
+        self._system_no_history = [self._system_block]
+
+        # Extra request options for tool-enabled calls (beta opt-ins)
+        self._tool_request_options: Dict[str, Any] = {}
+        if token_efficient_tools and model.startswith(self.TOKEN_EFFICIENT_TOOLS_MODELS):
+            self._tool_request_options["extra_headers"] = {
+                "anthropic-beta": self.TOKEN_EFFICIENT_TOOLS_BETA
+            }
 
-    def generate_response(
+    async def generate_response(
         self,
         query: str,
         conversation_history: Optional[str] = None,
@@ -59,9 +155,17 @@ Provide only the direct answer to what was asked.
         """
         Generate AI response with optional tool usage and conversation context.
 
+        Runs without blocking the event loop: API calls are awaited on the async
+        client and tools run on the shared tool pool.
+
         Supports sequential tool calling - Claude can make up to max_tool_rounds
         tool calls in separate API rounds before providing the final answer.
 
+        Answers that did not require any tool execution are memoized, so a repeated
+        request with the same query, history and tools skips the API entirely.
+        Tool-based answers are never cached because their sources come from the
+        tool run itself.
+
         Args:
             query: The user's question or request
             conversation_history: Previous messages for context
@@ -72,113 +176,326 @@ Provide only the direct answer to what was asked.
             Generated response as string
         """
 
-        # Build system content efficiently - avoid string ops when possible
-        system_content = (
-            f"{self.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-            if conversation_history
-            else self.SYSTEM_PROMPT
-        )
+        # Serve repeated tool-free answers straight from the response cache
+        cache_key = self._cache_key(query, conversation_history, tools, tool_manager)
+        cached = self.response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Build structured system content - cached prompt first, history after it
+        system_content = self._build_system(conversation_history)
 
         # Build initial messages list with user query
         messages = [{"role": "user", "content": query}]
 
         # If no tools available, make single API call and return
+        # Pure-chat fast path: canonical kwargs passed by name, no dict merge
         if not tools or not tool_manager:
-            response = self.client.messages.create(
-                **self.base_params, messages=messages, system=system_content
+            response = await self.client.messages.create(
+                model=self.model,
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                messages=messages,
+                system=system_content,
             )
-            return response.content[0].text
+            text = getattr(response.content[0], "text", None)
+            if text is None:
+                # Extended thinking puts thinking blocks ahead of the answer text
+                text = next(
+                    (b.text for b in response.content if getattr(b, "type", "text") == "text"), ""
+                )
+            self.response_cache.put(cache_key, text)
+            return text
+
+        # Mark the tool schemas as cacheable so every round reuses the same prefix
+        tools = self._with_cache_control(tools)
+
+        # Built once: messages is appended to in place, so every round sees the
+        # latest conversation without rebuilding the request dict
+        api_params = {
+            **self.base_params,
+            "messages": messages,
+            "system": system_content,
+            "tools": tools,
+            "tool_choice": {"type": "auto"},
+            **self._tool_request_options,
+        }
+
+        # Tool outcomes for this request only, so repeated identical calls run once
+        tool_memo: Dict[str, Any] = {}
 
         # === MAIN LOOP: Sequential tool calling ===
         # Each iteration: API call -> check for tool use -> execute tools -> repeat
         for round_num in range(self.max_tool_rounds + 1):
 
-            # Prepare API parameters for this round
-            api_params = {
-                **self.base_params,
-                "messages": messages,
-                "system": system_content,
-                "tools": tools,
-                "tool_choice": {"type": "auto"},
-            }
-
             # Get response from Claude
-            response = self.client.messages.create(**api_params)
+            response = await self.client.messages.create(**api_params)
 
             # Append assistant's response to conversation history
             messages.append({"role": "assistant", "content": response.content})
 
             # TERMINATION 1: No tool use requested - Claude answered directly
             if response.stop_reason != "tool_use":
-                return self._extract_text(response)
+                text = getattr(response.content[0], "text", None)
+                if text is None:
+                    # Extended thinking puts thinking blocks ahead of the answer text
+                    text = next(
+                        (b.text for b in response.content if getattr(b, "type", "text") == "text"),
+                        "",
+                    )
+                if round_num == 0:
+                    # No tools ran, so the answer is safe to reuse
+                    self.response_cache.put(cache_key, text)
+                return text
 
             # TERMINATION 2: Max rounds reached - force final synthesis
             if round_num >= self.max_tool_rounds:
-                return self._force_final_synthesis(messages, system_content)
+                return await self._force_final_synthesis(messages, system_content)
 
             # Execute tools and build result blocks
-            tool_results, had_error = self._execute_tools_from_response(response, tool_manager)
+            tool_results, had_error = await self._execute_tools_from_response(
+                response, tool_manager, tool_memo
+            )
 
             # Append tool results to conversation for next round
             messages.append({"role": "user", "content": tool_results})
 
             # TERMINATION 3: Tool execution failed - force final synthesis with error info
             if had_error:
-                return self._force_final_synthesis(messages, system_content)
+                return await self._force_final_synthesis(messages, system_content)
 
             # Loop continues - tools remain available for next round
 
         # Should not reach here, but return safe default
         return "I apologize, but I was unable to complete your request."
 
-    def _execute_tools_from_response(self, response, tool_manager) -> tuple:
+    def _cache_key(
+        self,
+        query: str,
+        conversation_history: Optional[str],
+        tools: Optional[List],
+        tool_manager=None,
+    ) -> str:
+        """
+        Build a stable response-cache key for a request.
+
+        Tools are only offered to Claude when a tool_manager is also given, so
+        whether one was passed is part of the key.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous messages for context
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+
+        Returns:
+            Hex digest identifying the request
+        """
+        payload: List[Any] = [
+            self.model,
+            self.SYSTEM_PROMPT,
+            conversation_history,
+            query,
+            tools or [],
+            bool(tools and tool_manager),
+        ]
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    def _build_system(self, conversation_history: Optional[str]) -> List[Dict]:
+        """
+        Build the structured system prompt for an API call.
+
+        The static prompt block carries the cache breakpoint; conversation history
+        is appended as a separate, uncached block so it never invalidates the prefix.
+
+        Args:
+            conversation_history: Previous messages for context
+
+        Returns:
+            List of system content blocks
+        """
+        if not conversation_history:
+            return self._system_no_history
+        return [
+            self._system_block,
+            {"type": "text", "text": "".join((self.HISTORY_PREFIX, conversation_history))},
+        ]
+
+    @staticmethod
+    def _with_cache_control(tools: List[Dict]) -> List[Dict]:
+        """
+        Return a copy of the tool definitions with a cache breakpoint on the last one.
+
+        Definitions from ToolManager arrive already marked and are returned as is.
+
+        Args:
+            tools: Tool definitions passed by the caller (left unmodified)
+
+        Returns:
+            Tool definitions with cache_control on the last entry
+        """
+        if "cache_control" in tools[-1]:
+            return tools
+        cached_tools = list(tools)
+        cached_tools[-1] = {**cached_tools[-1], "cache_control": {"type": "ephemeral"}}
+        return cached_tools
+
+    async def _execute_tools_from_response(
+        self, response, tool_manager, tool_memo: Optional[Dict[str, Any]] = None
+    ) -> tuple:
         """
         Execute all tools in a Claude response.
 
+        Tools are synchronous (ChromaDB lookups), so independent tool_use blocks
+        from the same turn run in parallel on the shared tool pool. Calls to
+        source-tracking tools run one after another in block order (see
+        _tool_units). Calls already answered earlier in the request are served
+        from tool_memo.
+
         Args:
             response: Claude API response containing tool_use blocks
             tool_manager: Manager to execute tools
+            tool_memo: Outcomes keyed by tool call, scoped to one generate_response
 
         Returns:
             Tuple of (tool_results list, had_error boolean)
         """
-        tool_results = []
-        had_error = False
+        tool_memo = {} if tool_memo is None else tool_memo
+        tool_blocks = [block for block in response.content if block.type == "tool_use"]
+        keys, pending = self._pending_tool_calls(tool_blocks, tool_memo)
+        units = self._tool_units(pending, tool_manager)
+
+        loop = asyncio.get_running_loop()
+        # gather keeps submission order, so outcomes line up with their units
+        unit_outcomes = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    self._tool_pool, self._run_unit, tool_manager, [pending[key] for key in unit]
+                )
+                for unit in units
+            )
+        )
+        for unit, outcomes in zip(units, unit_outcomes, strict=True):
+            tool_memo.update(zip(unit, outcomes, strict=True))
 
-        for content_block in response.content:
-            if content_block.type == "tool_use":
-                try:
-                    tool_result = tool_manager.execute_tool(
-                        content_block.name, **content_block.input
-                    )
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": content_block.id,
-                            "content": tool_result,
-                        }
-                    )
-                except Exception as e:
-                    # Tool execution failed - include error in results
-                    tool_results.append(
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": content_block.id,
-                            "content": f"Error executing {content_block.name}: {str(e)}",
-                            "is_error": True,
-                        }
-                    )
-                    had_error = True
+        return self._collect_tool_results(tool_blocks, [tool_memo[key] for key in keys])
+
+    @staticmethod
+    def _pending_tool_calls(
+        tool_blocks: List, tool_memo: Dict[str, Any]
+    ) -> Tuple[List[str], Dict[str, Any]]:
+        """
+        Key each tool_use block and pick out the distinct calls that still need to run.
+
+        Args:
+            tool_blocks: tool_use blocks in the order Claude emitted them
+            tool_memo: Outcomes of calls already made in this request
+
+        Returns:
+            Tuple of (key per block, {key: block} for calls not yet in tool_memo)
+        """
+        keys = [
+            json.dumps([block.name, block.input], sort_keys=True, default=str)
+            for block in tool_blocks
+        ]
+        pending: Dict[str, Any] = {}
+        for key, block in zip(keys, tool_blocks, strict=True):
+            if key not in tool_memo and key not in pending:
+                pending[key] = block
+        return keys, pending
+
+    @staticmethod
+    def _tool_units(pending: Dict[str, Any], tool_manager) -> List[List[str]]:
+        """
+        Group the pending calls into units that can run in parallel.
+
+        Source-tracking tools record the sources of their latest call, so running
+        two of them at once would leave whichever finished last. Their calls share
+        one unit and run in block order, as they would without the pool; every
+        other call is a unit of its own.
+
+        Args:
+            pending: {key: block} for the calls still to run, in block order
+            tool_manager: Manager that knows which tools track sources
+
+        Returns:
+            Lists of pending keys, each list run sequentially
+        """
+        units: List[List[str]] = []
+        tracked: Optional[List[str]] = None
+        for key, block in pending.items():
+            if not tool_manager.tracks_sources(block.name):
+                units.append([key])
+            elif tracked is None:
+                tracked = [key]
+                units.append(tracked)
+            else:
+                tracked.append(key)
+        return units
+
+    @classmethod
+    def _collect_tool_results(cls, tool_blocks: List, outcomes: List) -> Tuple[List[Dict], bool]:
+        """
+        Build the tool_result blocks and the error flag.
+
+        The returned list is appended to the conversation and re-sent on every
+        later round, so it lives for the whole request and cannot be recycled.
+
+        Args:
+            tool_blocks: tool_use blocks in the order Claude emitted them
+            outcomes: Matching tool return values or raised exceptions
+
+        Returns:
+            Tuple of (tool_results list, had_error boolean)
+        """
+        results = [
+            cls._tool_result(block, outcome)
+            for block, outcome in zip(tool_blocks, outcomes, strict=True)
+        ]
+        return [result.to_block() for result in results], any(r.is_error for r in results)
+
+    @staticmethod
+    def _run_tool(tool_manager, content_block) -> Any:
+        """Execute one tool_use block, returning the exception instead of raising it"""
+        try:
+            return tool_manager.execute_tool(content_block.name, **content_block.input)
+        except Exception as e:
+            return e
+
+    @classmethod
+    def _run_unit(cls, tool_manager, content_blocks: List) -> List[Any]:
+        """Execute a unit of tool_use blocks one after another"""
+        return [cls._run_tool(tool_manager, block) for block in content_blocks]
+
+    @staticmethod
+    def _tool_result(content_block, outcome: Any) -> ToolResult:
+        """
+        Build the result record for one executed tool_use block.
 
-        return tool_results, had_error
+        Args:
+            content_block: The tool_use block Claude emitted
+            outcome: The tool's return value, or the exception it raised
 
-    def _force_final_synthesis(self, messages: List[Dict], system_content: str) -> str:
+        Returns:
+            ToolResult for the next user message
+        """
+        if isinstance(outcome, Exception):
+            # Tool execution failed - include error in results
+            return ToolResult(
+                content_block.id,
+                f"Error executing {content_block.name}: {str(outcome)}",
+                is_error=True,
+            )
+        return ToolResult(content_block.id, outcome)
+
+    async def _force_final_synthesis(self, messages: List[Dict], system_content: List[Dict]) -> str:
         """
         Make a final API call without tools to force Claude to synthesize an answer.
 
         Args:
             messages: Current conversation history
-            system_content: System prompt
+            system_content: Structured system prompt (same blocks as the tool rounds)
 
         Returns:
             Final text response from Claude
@@ -190,17 +507,11 @@ Provide only the direct answer to what was asked.
             # Note: tools and tool_choice intentionally omitted
         }
 
-        final_response = self.client.messages.create(**final_params)
-        return self._extract_text(final_response)
-
-    def _extract_text(self, response) -> str:
-        """
-        Extract text content from a Claude API response.
-
-        Args:
-            response: Claude API response
-
-        Returns:
-            Text content of the response
-        """
-        return response.content[0].text
+        response = await self.client.messages.create(**final_params)
+        text = getattr(response.content[0], "text", None)
+        if text is None:
+            # Extended thinking puts thinking blocks ahead of the answer text
+            text = next(
+                (b.text for b in response.content if getattr(b, "type", "text") == "text"), ""
+            )
+        return text
@@ -23,6 +23,7 @@ class Config:
     MAX_RESULTS: int = 5  # Maximum search results to return
     MAX_HISTORY: int = 2  # Number of conversation messages to remember
     MAX_TOOL_ROUNDS: int = 2  # Maximum sequential tool calls per query
+    RESPONSE_CACHE_SIZE: int = 512  # Cached tool-free answers (0 disables the cache)
 
     # Database paths
     CHROMA_PATH: str = "./chroma_db"  # ChromaDB storage location
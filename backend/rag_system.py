@@ -20,7 +20,10 @@ class RAGSystem:
             config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS
         )
         self.ai_generator = AIGenerator(
-            config.ANTHROPIC_API_KEY, config.ANTHROPIC_MODEL, config.MAX_TOOL_ROUNDS
+            config.ANTHROPIC_API_KEY,
+            config.ANTHROPIC_MODEL,
+            config.MAX_TOOL_ROUNDS,
+            config.RESPONSE_CACHE_SIZE,
         )
         self.session_manager = SessionManager(config.MAX_HISTORY)
 
@@ -50,6 +53,7 @@ class RAGSystem:
 
             # Add course content chunks to vector store
             self.vector_store.add_course_content(course_chunks)
+            self.outline_tool.clear_cache()
 
             return course, len(course_chunks)
         except Exception as e:
@@ -74,6 +78,7 @@ class RAGSystem:
         if clear_existing:
             print("Clearing existing data for fresh rebuild...")
             self.vector_store.clear_all_data()
+            self.outline_tool.clear_cache()
 
         if not os.path.exists(folder_path):
             print(f"Folder {folder_path} does not exist")
@@ -97,6 +102,7 @@ class RAGSystem:
                         # This is a new course - add it to the vector store
                         self.vector_store.add_course_metadata(course)
                         self.vector_store.add_course_content(course_chunks)
+                        self.outline_tool.clear_cache()
                         total_courses += 1
                         total_chunks += len(course_chunks)
                         print(f"Added new course: {course.title} ({len(course_chunks)} chunks)")
@@ -108,44 +114,39 @@ class RAGSystem:
 
         return total_courses, total_chunks
 
-    def query(self, query: str, session_id: Optional[str] = None) -> Tuple[str, List[str]]:
+    async def aquery(self, query: str, session_id: Optional[str] = None) -> Tuple[str, List[str]]:
         """
         Process a user query using the RAG system with tool-based search.
 
+        Must be awaited inside the event loop. Each call runs its tools through a per-request view of the tool manager,
+        so sources from concurrent requests never mix.
+
         Args:
             query: User's question
             session_id: Optional session ID for conversation context
 
         Returns:
-            Tuple of (response, sources list - empty for tool-based approach)
+            Tuple of (response, sources list)
         """
-        # Create prompt for the AI with clear instructions
         prompt = f"""Answer this question about course materials: {query}"""
 
-        # Get conversation history if session exists
         history = None
         if session_id:
             history = self.session_manager.get_conversation_history(session_id)
 
-        # Generate response using AI with tools
-        response = self.ai_generator.generate_response(
+        tool_manager = self.tool_manager.for_request()
+        response = await self.ai_generator.generate_response(
             query=prompt,
             conversation_history=history,
-            tools=self.tool_manager.get_tool_definitions(),
-            tool_manager=self.tool_manager,
+            tools=tool_manager.get_tool_definitions(),
+            tool_manager=tool_manager,
         )
 
-        # Get sources from the search tool
-        sources = self.tool_manager.get_last_sources()
-
-        # Reset sources after retrieving them
-        self.tool_manager.reset_sources()
+        sources = tool_manager.get_last_sources()
 
-        # Update conversation history
         if session_id:
             self.session_manager.add_exchange(session_id, query, response)
 
-        # Return response with sources from tool searches
         return response, sources
 
     def get_course_analytics(self) -> Dict:
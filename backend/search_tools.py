@@ -1,11 +1,16 @@
-from typing import Dict, Any, Optional, Protocol
+import copy
+import functools
+from typing import Dict, Any, List, Optional, Protocol, Tuple
 from abc import ABC, abstractmethod
-from vector_store import VectorStore, SearchResults
+from vector_store import VectorStore, SearchResults, json_loads
 
 
 class Tool(ABC):
     """Abstract base class for all tools"""
 
+    # Tools that expose last_sources for the UI set this to True
+    tracks_sources: bool = False
+
     @abstractmethod
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
@@ -16,38 +21,47 @@ class Tool(ABC):
         """Execute the tool with given parameters"""
         pass
 
+    def execute_with_sources(self, **kwargs) -> Tuple[str, List[Dict[str, Any]]]:
+        """Execute the tool and return its sources instead of storing them on the tool"""
+        return self.execute(**kwargs), []
+
 
 class CourseSearchTool(Tool):
     """Tool for searching course content with semantic course name matching"""
 
+    tracks_sources = True
+
+    # Static schema, built once per class and shared by every instance
+    _DEFINITION: Dict[str, Any] = {
+        "name": "search_course_content",
+        "description": "Search course materials with smart course name matching and lesson filtering",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "What to search for in the course content",
+                },
+                "course_name": {
+                    "type": "string",
+                    "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction')",
+                },
+                "lesson_number": {
+                    "type": "integer",
+                    "description": "Specific lesson number to search within (e.g. 1, 2, 3)",
+                },
+            },
+            "required": ["query"],
+        },
+    }
+
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
         self.last_sources = []  # Track sources from last search
 
     def get_tool_definition(self) -> Dict[str, Any]:
-        """Return Anthropic tool definition for this tool"""
-        return {
-            "name": "search_course_content",
-            "description": "Search course materials with smart course name matching and lesson filtering",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "What to search for in the course content",
-                    },
-                    "course_name": {
-                        "type": "string",
-                        "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction')",
-                    },
-                    "lesson_number": {
-                        "type": "integer",
-                        "description": "Specific lesson number to search within (e.g. 1, 2, 3)",
-                    },
-                },
-                "required": ["query"],
-            },
-        }
+        """Return Anthropic tool definition for this tool (shared, do not mutate)"""
+        return self._DEFINITION
 
     def execute(
         self, query: str, course_name: Optional[str] = None, lesson_number: Optional[int] = None
@@ -63,6 +77,28 @@ class CourseSearchTool(Tool):
         Returns:
             Formatted search results or error message
         """
+        text, sources = self.execute_with_sources(query, course_name, lesson_number)
+        if sources:
+            self.last_sources = sources
+        return text
+
+    def execute_with_sources(  # type: ignore[override]
+        self, query: str, course_name: Optional[str] = None, lesson_number: Optional[int] = None
+    ) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Run a search and return its sources alongside the text.
+
+        Leaves last_sources untouched, so concurrent requests sharing this tool
+        each keep their own sources.
+
+        Args:
+            query: What to search for
+            course_name: Optional course filter
+            lesson_number: Optional lesson filter
+
+        Returns:
+            Tuple of (formatted results or error message, {text, url} sources)
+        """
 
         # Use the vector store's unified search interface
         results = self.store.search(
@@ -71,7 +107,7 @@ class CourseSearchTool(Tool):
 
         # Handle errors
         if results.error:
-            return results.error
+            return results.error, []
 
         # Handle empty results
         if results.is_empty():
@@ -80,69 +116,67 @@ class CourseSearchTool(Tool):
                 filter_info += f" in course '{course_name}'"
             if lesson_number:
                 filter_info += f" in lesson {lesson_number}"
-            return f"No relevant content found{filter_info}."
+            return f"No relevant content found{filter_info}.", []
 
         # Format and return results
         return self._format_results(results)
 
-    def _format_results(self, results: SearchResults) -> str:
-        """Format search results with course and lesson context"""
-        formatted = []
-        self.last_sources = []  # Track sources as {text, url} dicts for the UI
-
-        for doc, meta in zip(results.documents, results.metadata):
-            course_title = meta.get("course_title", "unknown")
-            lesson_num = meta.get("lesson_number")
-
-            # Build context header
-            header = f"[{course_title}"
-            if lesson_num is not None:
-                header += f" - Lesson {lesson_num}"
-            header += "]"
-
-            # Build source text for display
-            source_text = course_title
-            if lesson_num is not None:
-                source_text += f" - Lesson {lesson_num}"
-
-            # Fetch lesson link if available
-            url = None
-            if lesson_num is not None:
-                url = self.store.get_lesson_link(course_title, lesson_num)
+    def _format_results(self, results: SearchResults) -> Tuple[str, List[Dict[str, Any]]]:
+        """Format search results with course and lesson context, returning (text, sources)"""
+        courses = [meta.get("course_title", "unknown") for meta in results.metadata]
+        lessons = [meta.get("lesson_number") for meta in results.metadata]
+        keys = list(zip(courses, lessons, strict=True))
 
-            # Fall back to course-level link if no lesson link
-            if not url:
-                url = self.store.get_course_link(course_title)
+        # Header/source label per result, e.g. "Course Title - Lesson 2"
+        labels = [
+            course if lesson is None else f"{course} - Lesson {lesson}"
+            for course, lesson in zip(courses, lessons, strict=True)
+        ]
 
-            # Store source with text and url
-            self.last_sources.append({"text": source_text, "url": url})
+        # One catalog lookup for every lesson link (falling back to course links)
+        links = self.store.get_links_bulk(keys)
 
-            formatted.append(f"{header}\n{doc}")
+        # Sources as {text, url} dicts for the UI
+        sources = [
+            {"text": label, "url": links.get(key)} for label, key in zip(labels, keys, strict=True)
+        ]
 
-        return "\n\n".join(formatted)
+        text = "\n\n".join(
+            f"[{label}]\n{doc}" for label, doc in zip(labels, results.documents, strict=True)
+        )
+        return text, sources
 
 
 class CourseOutlineTool(Tool):
     """Tool for retrieving course outlines and lesson lists"""
 
+    # Anthropic tool schema, as for CourseSearchTool
+    _DEFINITION: Dict[str, Any] = {
+        "name": "get_course_outline",
+        "description": "Get course structure including title, link, and complete lesson list. Use for questions about course curriculum or what a course covers.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "course_name": {
+                    "type": "string",
+                    "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction'). If omitted, lists all available courses.",
+                }
+            },
+        },
+    }
+
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
+        # Rendered outlines per resolved course title; cleared when the catalog changes
+        self._outline_cache = functools.lru_cache(maxsize=256)(self._render_outline)
+
+    def clear_cache(self):
+        """Drop cached outlines (call after adding or clearing courses)"""
+        self._outline_cache.cache_clear()
 
     def get_tool_definition(self) -> Dict[str, Any]:
-        """Return Anthropic tool definition for this tool"""
-        return {
-            "name": "get_course_outline",
-            "description": "Get course structure including title, link, and complete lesson list. Use for questions about course curriculum or what a course covers.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "course_name": {
-                        "type": "string",
-                        "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction'). If omitted, lists all available courses.",
-                    }
-                },
-            },
-        }
+        """Return Anthropic tool definition for this tool (shared, do not mutate)"""
+        return self._DEFINITION
 
     def execute(self, course_name: Optional[str] = None) -> str:
         """
@@ -154,8 +188,6 @@ class CourseOutlineTool(Tool):
         Returns:
             Formatted course outline or list of all courses
         """
-        import json
-
         # If no course specified, list all available courses
         if not course_name:
             all_courses = self.store.get_all_courses_metadata()
@@ -174,44 +206,70 @@ class CourseOutlineTool(Tool):
         if not resolved_title:
             return f"No course found matching '{course_name}'."
 
-        # Get course metadata from catalog
+        # Outline is deterministic for a stored course, so reuse the rendered text
         try:
-            results = self.store.course_catalog.get(ids=[resolved_title])
-            if not results or not results.get("metadatas"):
-                return f"Course data not found for '{resolved_title}'."
-
-            metadata = results["metadatas"][0]
-            title = metadata.get("title", resolved_title)
-            course_link = metadata.get("course_link", "No link available")
-            lessons_json = metadata.get("lessons_json")
-
-            # Build formatted outline
-            formatted = [f"Course: {title}", f"Link: {course_link}", ""]
-
-            if lessons_json:
-                lessons = json.loads(lessons_json)
-                # Sort by lesson number
-                lessons.sort(key=lambda x: x.get("lesson_number", 0))
-
-                formatted.append("Lessons:")
-                for lesson in lessons:
-                    num = lesson.get("lesson_number", "?")
-                    lesson_title = lesson.get("lesson_title", "Untitled")
-                    formatted.append(f"{num}. {lesson_title}")
-            else:
-                formatted.append("No lesson information available.")
-
-            return "\n".join(formatted)
-
+            outline = self._outline_cache(resolved_title)
         except Exception as e:
             return f"Error retrieving course outline: {str(e)}"
 
+        if outline is None:
+            return f"Course data not found for '{resolved_title}'."
+        return outline
+
+    def _render_outline(self, resolved_title: str) -> Optional[str]:
+        """Parse a course's catalog metadata into outline text, or None if it is missing"""
+        results = self.store.course_catalog.get(ids=[resolved_title])
+        if not results or not results.get("metadatas"):
+            return None
+
+        metadata = results["metadatas"][0]
+        title = metadata.get("title", resolved_title)
+        course_link = metadata.get("course_link", "No link available")
+        lessons_json = metadata.get("lessons_json")
+
+        # Build formatted outline
+        formatted = [f"Course: {title}", f"Link: {course_link}", ""]
+
+        if lessons_json:
+            lessons = json_loads(lessons_json)
+            # Sort by lesson number
+            lessons.sort(key=lambda x: x.get("lesson_number", 0))
+
+            formatted.append("Lessons:")
+            for lesson in lessons:
+                num = lesson.get("lesson_number", "?")
+                lesson_title = lesson.get("lesson_title", "Untitled")
+                formatted.append(f"{num}. {lesson_title}")
+        else:
+            formatted.append("No lesson information available.")
+
+        return "\n".join(formatted)
+
 
 class ToolManager:
     """Manages available tools for the AI"""
 
     def __init__(self):
         self.tools = {}
+        # Tools reporting last_sources, collected at registration
+        self._source_tools: list = []
+        # Definitions are static once registered, so build the list sent to Claude once
+        self._definitions_cache: Optional[list] = None
+        # Sources returned to this manager's tool calls; only set on for_request() views
+        self._request_sources: Optional[list] = None
+
+    def for_request(self) -> "ToolManager":
+        """
+        Return a view of this manager for a single request.
+
+        The view shares the registered tools and the cached definitions, but keeps
+        the sources its own tool calls return instead of reading them off the
+        shared tools, so concurrent requests never see each other's sources.
+        Register tools on the manager, never on a view.
+        """
+        view = copy.copy(self)
+        view._request_sources = []
+        return view
 
     def register_tool(self, tool: Tool):
         """Register any tool that implements the Tool interface"""
@@ -219,29 +277,59 @@ class ToolManager:
         tool_name = tool_def.get("name")
         if not tool_name:
             raise ValueError("Tool must have a 'name' in its definition")
+        previous = self.tools.get(tool_name)
+        if previous in self._source_tools:
+            self._source_tools.remove(previous)
         self.tools[tool_name] = tool
+        self._definitions_cache = None
+        if tool.tracks_sources:
+            self._source_tools.append(tool)
+
+    def tracks_sources(self, tool_name: str) -> bool:
+        """Whether the named tool records sources, so its calls must not overlap"""
+        return self.tools.get(tool_name) in self._source_tools
 
     def get_tool_definitions(self) -> list:
-        """Get all tool definitions for Anthropic tool calling"""
-        return [tool.get_tool_definition() for tool in self.tools.values()]
+        """
+        Get all tool definitions for Anthropic tool calling.
+
+        The list is cached until the next register_tool call and its last entry
+        already carries the prompt-cache breakpoint, so callers must not mutate it.
+        """
+        if self._definitions_cache is None:
+            definitions = [tool.get_tool_definition() for tool in self.tools.values()]
+            if definitions:
+                definitions[-1] = {**definitions[-1], "cache_control": {"type": "ephemeral"}}
+            self._definitions_cache = definitions
+        return self._definitions_cache
 
     def execute_tool(self, tool_name: str, **kwargs) -> str:
         """Execute a tool by name with given parameters"""
         if tool_name not in self.tools:
             return f"Tool '{tool_name}' not found"
 
-        return self.tools[tool_name].execute(**kwargs)
+        tool = self.tools[tool_name]
+        if self._request_sources is None:
+            return tool.execute(**kwargs)
+
+        text, sources = tool.execute_with_sources(**kwargs)
+        if sources:
+            self._request_sources = sources
+        return text
 
     def get_last_sources(self) -> list:
         """Get sources from the last search operation"""
-        # Check all tools for last_sources attribute
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources") and tool.last_sources:
+        if self._request_sources is not None:
+            return self._request_sources
+        for tool in self._source_tools:
+            if tool.last_sources:
                 return tool.last_sources
         return []
 
     def reset_sources(self):
         """Reset sources from all tools that track sources"""
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources"):
-                tool.last_sources = []
+        if self._request_sources is not None:
+            self._request_sources = []
+            return
+        for tool in self._source_tools:
+            tool.last_sources = []
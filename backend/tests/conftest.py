@@ -2,20 +2,30 @@
 Pytest fixtures for RAG system testing.
 """
 
-import os
-import sys
+import copy
 import pytest
-from unittest.mock import Mock, MagicMock, patch
-from dataclasses import dataclass
+from fastapi import FastAPI, HTTPException
+from fastapi.middleware import Middleware
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+from unittest.mock import AsyncMock, Mock, call, create_autospec, patch
+from dataclasses import dataclass, field
+from types import MappingProxyType, SimpleNamespace
 from typing import List, Dict, Any, Optional
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Backend modules pull in chromadb, sentence-transformers and anthropic, so they
+# are imported inside the fixtures that need them; API tests never load them.
 
-from vector_store import SearchResults, VectorStore
-from search_tools import CourseSearchTool, CourseOutlineTool, ToolManager
-from ai_generator import AIGenerator
-from rag_system import RAGSystem
+
+def pytest_ignore_collect(collection_path, config):
+    """On `-m integration` runs, skip importing the unit test modules entirely."""
+    if (
+        config.getoption("markexpr") == "integration"
+        and collection_path.name.startswith("test_")
+        and "integration" not in collection_path.parts
+    ):
+        return True
+    return None
 
 
 # Sample test data
@@ -24,8 +34,58 @@ SAMPLE_COURSE_LINK = "https://example.com/mcp"
 SAMPLE_INSTRUCTOR = "Test Instructor"
 
 
-@pytest.fixture
-def mock_config():
+# Plain stand-ins for Anthropic SDK objects; only the call sites that tests
+# assert on (messages.create, RAG system methods) remain Mocks
+@dataclass
+class StubContent:
+    """Text content block of a Claude response."""
+
+    text: str
+    type: str = "text"
+
+
+@dataclass
+class StubToolUse:
+    """tool_use content block of a Claude response."""
+
+    id: str
+    name: str
+    input: Dict[str, Any]
+    type: str = "tool_use"
+
+
+@dataclass
+class StubResponse:
+    """Claude Messages API response."""
+
+    stop_reason: str
+    content: List[Any] = field(default_factory=list)
+
+
+class ScriptedCreate:
+    """
+    messages.create stand-in that replays canned responses in order.
+
+    Records calls in call_args_list like a Mock, without Mock's side_effect
+    bookkeeping on every call. Calling it returns a coroutine, matching the
+    AsyncAnthropic client.
+    """
+
+    def __init__(self, *responses):
+        self._responses = iter(responses)
+        self.call_args_list = []
+
+    @property
+    def call_count(self) -> int:
+        return len(self.call_args_list)
+
+    async def __call__(self, **kwargs):
+        self.call_args_list.append(call(**kwargs))
+        return next(self._responses)
+
+
+@pytest.fixture(scope="session")
+def mock_config(tmp_path_factory):
     """Create a mock configuration for testing."""
     config = Mock()
     config.ANTHROPIC_API_KEY = "test-api-key-123"
@@ -35,66 +95,198 @@ def mock_config():
     config.CHUNK_OVERLAP = 100
     config.MAX_RESULTS = 5
     config.MAX_HISTORY = 2
-    config.CHROMA_PATH = "./test_chroma_db"
+    config.MAX_TOOL_ROUNDS = 2
+    config.RESPONSE_CACHE_SIZE = 512
+    # tmp_path_factory's base directory is per xdist worker, so parallel runs never
+    # share (or leave behind) a Chroma directory
+    config.CHROMA_PATH = str(tmp_path_factory.mktemp("chroma"))
     return config
 
 
-@pytest.fixture
+_SAMPLE_SEARCH_RESULTS_TEMPLATE = dict(
+    documents=[
+        "MCP is a protocol that enables AI to interact with external tools and data sources.",
+        "The MCP server provides context and capabilities to AI models.",
+    ],
+    metadata=[
+        {"course_title": SAMPLE_COURSE_TITLE, "lesson_number": 1, "chunk_index": 0},
+        {"course_title": SAMPLE_COURSE_TITLE, "lesson_number": 2, "chunk_index": 1},
+    ],
+    distances=[0.23, 0.31],
+    error=None,
+)
+
+
+@pytest.fixture(scope="session")
 def sample_search_results():
-    """Create sample search results for testing."""
-    return SearchResults(
-        documents=[
-            "MCP is a protocol that enables AI to interact with external tools and data sources.",
-            "The MCP server provides context and capabilities to AI models.",
-        ],
-        metadata=[
-            {"course_title": SAMPLE_COURSE_TITLE, "lesson_number": 1, "chunk_index": 0},
-            {"course_title": SAMPLE_COURSE_TITLE, "lesson_number": 2, "chunk_index": 1},
-        ],
-        distances=[0.23, 0.31],
-        error=None,
-    )
+    """Shared sample search results; read-only, use mutable_sample_search_results to modify."""
+    from vector_store import SearchResults
+
+    return SearchResults(**copy.deepcopy(_SAMPLE_SEARCH_RESULTS_TEMPLATE))
 
 
 @pytest.fixture
+def mutable_sample_search_results():
+    """Private deep copy of the sample search results for tests that mutate them."""
+    from vector_store import SearchResults
+
+    return SearchResults(**copy.deepcopy(_SAMPLE_SEARCH_RESULTS_TEMPLATE))
+
+
+@pytest.fixture(scope="session")
 def empty_search_results():
     """Create empty search results for testing."""
+    from vector_store import SearchResults
+
     return SearchResults(documents=[], metadata=[], distances=[], error=None)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def error_search_results():
     """Create search results with error for testing."""
+    from vector_store import SearchResults
+
     return SearchResults(
         documents=[], metadata=[], distances=[], error="Search error: ChromaDB connection failed"
     )
 
 
-@pytest.fixture
-def mock_vector_store():
-    """Create a mock vector store for testing."""
-    mock_store = Mock(spec=VectorStore)
+def _register_shared_mock(request, reset):
+    """Have _reset_shared_mocks call reset after every test of the session."""
+    if not hasattr(request.session, "_shared_mocks"):
+        request.session._shared_mocks = []
+    request.session._shared_mocks.append(reset)
+
+
+@pytest.fixture(autouse=True)
+def _reset_shared_mocks(request):
+    """Return every session-scoped mock to its canonical state once a test finishes."""
+    yield
+    for reset in getattr(request.session, "_shared_mocks", ()):
+        reset()
+
+
+_LESSONS_JSON = (
+    '[{"lesson_number": 0, "lesson_title": "Intro", "lesson_link": "link0"}, '
+    '{"lesson_number": 1, "lesson_title": "Advanced", "lesson_link": "link1"}]'
+)
+
+# Catalog row served by the fake course_catalog.get, built once and read-only
+_CATALOG_RETURN = MappingProxyType(
+    {
+        "metadatas": [
+            MappingProxyType(
+                {
+                    "title": SAMPLE_COURSE_TITLE,
+                    "course_link": SAMPLE_COURSE_LINK,
+                    "lessons_json": _LESSONS_JSON,
+                    "lesson_count": 2,
+                }
+            )
+        ]
+    }
+)
+
+
+class FakeVectorStore:
+    """
+    In-memory stand-in for VectorStore exposing only what the tools and RAGSystem call.
+
+    A plain class avoids Mock(spec=VectorStore) introspection. search and
+    _resolve_course_name run on every tool call, so they are plain methods that
+    record their calls in search_calls/resolve_calls and answer from
+    search_results/resolved_title (search raises search_error when set). The
+    remaining methods are autospecced Mocks, checked against VectorStore's
+    signatures, so tests can assert on calls and override return values.
+    Everything is reset in place, so sharing one instance is cheap.
+    """
+
+    # Hand-written methods, and the Mock-backed ones
+    _FAKED_METHODS = ("search", "_resolve_course_name")
+    _MOCKED_METHODS = (
+        "get_course_link",
+        "get_lesson_link",
+        "get_links_bulk",
+        "get_all_courses_metadata",
+        "add_course_metadata",
+        "add_course_content",
+        "clear_all_data",
+        "get_existing_course_titles",
+        "get_course_count",
+    )
 
-    # Mock search method - returns sample results by default
-    mock_store.search = Mock(
-        return_value=SearchResults(
+    def __init__(self):
+        from vector_store import VectorStore
+
+        # Autospec the class once; its method Mocks reject calls VectorStore would
+        spec = create_autospec(VectorStore, instance=True)
+        self._mocks = {name: getattr(spec, name) for name in self._MOCKED_METHODS}
+        # Only get() is called on the catalog collection; a namespace avoids a nested Mock
+        self._course_catalog = SimpleNamespace(get=Mock())
+        self.reset()
+
+    def search(
+        self,
+        query: str,
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+        limit: Optional[int] = None,
+    ):
+        """Record the call and return search_results, or raise search_error if set."""
+        self.search_calls.append(
+            {
+                "query": query,
+                "course_name": course_name,
+                "lesson_number": lesson_number,
+                "limit": limit,
+            }
+        )
+        if self.search_error is not None:
+            raise self.search_error
+        return self.search_results
+
+    def _resolve_course_name(self, course_name: str) -> Optional[str]:
+        """Record the call and return resolved_title."""
+        self.resolve_calls.append(course_name)
+        return self.resolved_title
+
+    def reset(self):
+        """Reinstall the default behaviour and forget recorded calls."""
+        from vector_store import SearchResults
+
+        # Tests may rebind attributes; drop instance overrides of the faked methods
+        # and put the shared Mocks back before resetting them
+        for name in self._FAKED_METHODS:
+            self.__dict__.pop(name, None)
+        for name, mock in self._mocks.items():
+            mock.reset_mock(return_value=True, side_effect=True)
+            setattr(self, name, mock)
+        self._course_catalog.get.reset_mock(return_value=True, side_effect=True)
+        self.course_catalog = self._course_catalog
+
+        # search returns sample results by default
+        self.search_calls = []
+        self.search_error = None
+        self.search_results = SearchResults(
             documents=["Test content about MCP"],
             metadata=[{"course_title": SAMPLE_COURSE_TITLE, "lesson_number": 1, "chunk_index": 0}],
             distances=[0.1],
             error=None,
         )
-    )
 
-    # Mock _resolve_course_name for semantic matching
-    mock_store._resolve_course_name = Mock(return_value=SAMPLE_COURSE_TITLE)
+        # _resolve_course_name for semantic matching
+        self.resolve_calls = []
+        self.resolved_title = SAMPLE_COURSE_TITLE
 
-    # Mock get_course_link and get_lesson_link
-    mock_store.get_course_link = Mock(return_value=SAMPLE_COURSE_LINK)
-    mock_store.get_lesson_link = Mock(return_value=f"{SAMPLE_COURSE_LINK}/lesson1")
+        # Mock get_course_link and get_lesson_link
+        self.get_course_link.return_value = SAMPLE_COURSE_LINK
+        self.get_lesson_link.return_value = f"{SAMPLE_COURSE_LINK}/lesson1"
+        self.get_links_bulk.side_effect = lambda keys: {
+            key: f"{SAMPLE_COURSE_LINK}/lesson1" for key in keys
+        }
 
-    # Mock get_all_courses_metadata
-    mock_store.get_all_courses_metadata = Mock(
-        return_value=[
+        # Mock get_all_courses_metadata
+        self.get_all_courses_metadata.return_value = [
             {
                 "title": SAMPLE_COURSE_TITLE,
                 "instructor": SAMPLE_INSTRUCTOR,
@@ -119,222 +311,311 @@ def mock_vector_store():
                 "lesson_count": 3,
             }
         ]
-    )
 
-    # Mock course_catalog for CourseOutlineTool
-    mock_catalog = Mock()
-    mock_catalog.get = Mock(
-        return_value={
-            "metadatas": [
-                {
-                    "title": SAMPLE_COURSE_TITLE,
-                    "course_link": SAMPLE_COURSE_LINK,
-                    "lessons_json": '[{"lesson_number": 0, "lesson_title": "Intro", "lesson_link": "link0"}, {"lesson_number": 1, "lesson_title": "Advanced", "lesson_link": "link1"}]',
-                    "lesson_count": 2,
-                }
-            ]
-        }
-    )
-    mock_store.course_catalog = mock_catalog
+        # Mock course_catalog for CourseOutlineTool
+        self.course_catalog.get.return_value = _CATALOG_RETURN
 
-    return mock_store
+        # Write/analytics side used by RAGSystem
+        self.get_existing_course_titles.return_value = []
+        self.get_course_count.return_value = 0
 
 
-@pytest.fixture
-def course_search_tool(mock_vector_store):
-    """Create a CourseSearchTool instance with mock vector store."""
-    return CourseSearchTool(mock_vector_store)
+@pytest.fixture(scope="session")
+def _fake_vector_store(request):
+    """Vector store fake shared by the whole session; reset after every test."""
+    from vector_store import VectorStore
 
+    # One dir() scan per session keeps the fake honest the way Mock(spec=VectorStore)
+    # did per test
+    faked = FakeVectorStore._FAKED_METHODS + FakeVectorStore._MOCKED_METHODS
+    unknown = set(faked) - set(dir(VectorStore))
+    assert not unknown, f"FakeVectorStore fakes names VectorStore lacks: {sorted(unknown)}"
 
-@pytest.fixture
-def course_outline_tool(mock_vector_store):
-    """Create a CourseOutlineTool instance with mock vector store."""
-    return CourseOutlineTool(mock_vector_store)
+    store = FakeVectorStore()
+    _register_shared_mock(request, store.reset)
+    return store
 
 
 @pytest.fixture
-def tool_manager(course_search_tool, course_outline_tool):
-    """Create a ToolManager with registered tools."""
+def mock_vector_store(_fake_vector_store):
+    """The shared fake vector store in its default state."""
+    return _fake_vector_store
+
+
+@pytest.fixture(scope="session")
+def course_search_tool(request, _fake_vector_store):
+    """CourseSearchTool over the fake store, shared by the session; sources cleared per test."""
+    from search_tools import CourseSearchTool
+
+    tool = CourseSearchTool(_fake_vector_store)
+
+    def reset():
+        tool.last_sources = []
+        # Tests may stub execute on the instance; drop it so the class method is back
+        tool.__dict__.pop("execute", None)
+
+    _register_shared_mock(request, reset)
+    return tool
+
+
+@pytest.fixture(scope="session")
+def course_outline_tool(request, _fake_vector_store):
+    """CourseOutlineTool over the fake store, shared by the session; cache cleared per test."""
+    from search_tools import CourseOutlineTool
+
+    tool = CourseOutlineTool(_fake_vector_store)
+
+    def reset():
+        tool.clear_cache()
+        tool.__dict__.pop("execute", None)
+
+    _register_shared_mock(request, reset)
+    return tool
+
+
+@pytest.fixture(scope="session")
+def tool_manager(request, course_search_tool, course_outline_tool):
+    """ToolManager with both shared tools registered, built once per session."""
+    from search_tools import ToolManager
+
     manager = ToolManager()
     manager.register_tool(course_search_tool)
     manager.register_tool(course_outline_tool)
+
+    def reset():
+        # Tests stub execute_tool on the instance; drop it so the class method is back
+        manager.__dict__.pop("execute_tool", None)
+
+    _register_shared_mock(request, reset)
     return manager
 
 
-@pytest.fixture
-def mock_anthropic_client():
-    """Create a mock Anthropic client for testing."""
-    mock_client = MagicMock()
+@pytest.fixture(scope="session")
+def tool_defs(tool_manager):
+    """Tool definitions as sent to Claude, taken from the shared tool manager."""
+    return tool_manager.get_tool_definitions()
+
+
+@pytest.fixture(scope="session")
+def stubs():
+    """The Stub* response types, for tests that assemble multi-block responses."""
+    return SimpleNamespace(Content=StubContent, ToolUse=StubToolUse, Response=StubResponse)
+
+
+@pytest.fixture(scope="session")
+def make_tool_use_response():
+    """Factory for a stub Claude response requesting a single tool call."""
+
+    def make(name: str, tool_input: Dict[str, Any], tool_id: str = "toolu_x") -> StubResponse:
+        return StubResponse(
+            stop_reason="tool_use", content=[StubToolUse(id=tool_id, name=name, input=tool_input)]
+        )
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def sequence():
+    """
+    Build a side_effect that returns the given responses in order.
+
+    Hands Mock a plain callable over one iterator instead of a list for it to
+    wrap and re-check on every call.
+    """
+
+    def make(*responses):
+        it = iter(responses)
+        return lambda *args, **kwargs: next(it)
+
+    return make
+
+
+@pytest.fixture(scope="session")
+def make_final_response():
+    """Factory for a stub Claude response carrying a final text answer."""
+
+    def make(text: str) -> StubResponse:
+        return StubResponse(stop_reason="stop", content=[StubContent(text)])
+
+    return make
 
-    # Mock the messages.create method
-    mock_response = MagicMock()
-    mock_response.stop_reason = "stop"
-    mock_content = MagicMock()
-    mock_content.text = "This is a test response about MCP."
-    mock_response.content = [mock_content]
 
-    mock_client.messages.create = Mock(return_value=mock_response)
-    return mock_client
+@pytest.fixture(scope="session")
+def mock_anthropic_client(request):
+    """Stub AsyncAnthropic client whose messages.create records calls; reset after every test."""
+    mock_response = StubResponse(
+        stop_reason="stop", content=[StubContent("This is a test response about MCP.")]
+    )
+    create = AsyncMock()
+    client = SimpleNamespace(messages=SimpleNamespace(create=create))
+
+    def reset():
+        # Generator fixtures swap in their own create; restore the shared one
+        create.reset_mock(return_value=True, side_effect=True)
+        create.return_value = mock_response
+        client.messages.create = create
+
+    reset()
+    _register_shared_mock(request, reset)
+    return client
+
+
+def _generator_on(client, mock_config):
+    """Build an AIGenerator whose own client is the given stub."""
+    from ai_generator import AIGenerator
+
+    with patch("ai_generator.anthropic.AsyncAnthropic", return_value=client):
+        return AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
 
 
 @pytest.fixture
 def ai_generator_with_mock(mock_anthropic_client, mock_config):
     """Create an AIGenerator with mocked Anthropic client."""
-    with patch("ai_generator.anthropic.Anthropic", return_value=mock_anthropic_client):
-        generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
-        generator.client = mock_anthropic_client
-        return generator
+    return _generator_on(mock_anthropic_client, mock_config)
 
 
-@pytest.fixture
-def tool_use_response():
-    """Create a mock Anthropic response that triggers tool use."""
-    mock_response = MagicMock()
-    mock_response.stop_reason = "tool_use"
+# Canned Claude responses for the tool-use round trip, built once at import
+_TOOL_USE_RESPONSE = StubResponse(
+    stop_reason="tool_use",
+    content=[
+        StubToolUse(id="toolu_123", name="search_course_content", input={"query": "What is MCP?"})
+    ],
+)
+_TOOL_FINAL_RESPONSE = StubResponse(
+    stop_reason="stop", content=[StubContent("Based on the search results, MCP is...")]
+)
 
-    # Create mock tool_use block
-    mock_tool_use = MagicMock()
-    mock_tool_use.type = "tool_use"
-    mock_tool_use.id = "toolu_123"
-    mock_tool_use.name = "search_course_content"
-    mock_tool_use.input = {"query": "What is MCP?"}
 
-    mock_response.content = [mock_tool_use]
-    return mock_response
+@pytest.fixture(scope="session")
+def tool_use_response():
+    """Shared stub Anthropic response that triggers tool use (read-only)."""
+    return _TOOL_USE_RESPONSE
 
 
 @pytest.fixture
 def ai_generator_with_tool_use(mock_anthropic_client, mock_config, tool_use_response):
     """Create an AIGenerator that will return tool_use response."""
-    with patch("ai_generator.anthropic.Anthropic", return_value=mock_anthropic_client):
-        generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
-        generator.client = mock_anthropic_client
-        # First call returns tool_use, second returns final response
-        mock_anthropic_client.messages.create = Mock(
-            side_effect=[
-                tool_use_response,
-                MagicMock(
-                    stop_reason="stop",
-                    content=[MagicMock(text="Based on the search results, MCP is...")],
-                ),
-            ]
-        )
-        return generator
+    # First call returns tool_use, second returns final response
+    mock_anthropic_client.messages.create = ScriptedCreate(tool_use_response, _TOOL_FINAL_RESPONSE)
+    return _generator_on(mock_anthropic_client, mock_config)
 
 
-@pytest.fixture
+_SAMPLE_COURSE_METADATA_TEMPLATE = {
+    "title": SAMPLE_COURSE_TITLE,
+    "instructor": SAMPLE_INSTRUCTOR,
+    "course_link": SAMPLE_COURSE_LINK,
+    "lessons": [
+        {"lesson_number": 0, "lesson_title": "Introduction", "lesson_link": "link0"},
+        {"lesson_number": 1, "lesson_title": "Advanced Topics", "lesson_link": "link1"},
+    ],
+    "lesson_count": 2,
+}
+
+
+@pytest.fixture(scope="session")
 def sample_course_metadata():
-    """Sample course metadata for testing."""
-    return {
-        "title": SAMPLE_COURSE_TITLE,
-        "instructor": SAMPLE_INSTRUCTOR,
-        "course_link": SAMPLE_COURSE_LINK,
-        "lessons": [
-            {"lesson_number": 0, "lesson_title": "Introduction", "lesson_link": "link0"},
-            {"lesson_number": 1, "lesson_title": "Advanced Topics", "lesson_link": "link1"},
-        ],
-        "lesson_count": 2,
-    }
+    """Shared sample course metadata (read-only)."""
+    return _SAMPLE_COURSE_METADATA_TEMPLATE
 
 
-# ============================================================================
-# API Fixtures
-# ============================================================================
+@pytest.fixture(scope="module")
+def rag_patches(_fake_vector_store):
+    """
+    Patch RAGSystem's component classes once per test module.
 
-@pytest.fixture
-def mock_rag_system():
-    """Create a fully mocked RAGSystem for API testing."""
-    mock_system = Mock()
-    mock_system.session_manager = Mock()
-
-    # Mock session creation
-    mock_system.session_manager.create_session = Mock(return_value="test_session_123")
-    mock_system.session_manager.get_conversation_history = Mock(return_value=None)
-    mock_system.session_manager.add_exchange = Mock()
-
-    # Mock query method - returns tuple of (response, sources)
-    mock_system.query = Mock(return_value=(
-        "MCP is a protocol that enables AI to interact with external tools and data sources.",
-        [{"text": "MCP Course", "url": "https://example.com/mcp"}]
-    ))
-
-    # Mock get_course_analytics
-    mock_system.get_course_analytics = Mock(return_value={
-        "total_courses": 3,
-        "course_titles": [
-            "MCP: Build Rich-Context AI Apps",
-            "Building AI Assistants with Claude",
-            "Advanced Prompt Engineering"
-        ]
-    })
+    Tests that need a specific component assign it on the system they get
+    rather than configuring these shared class mocks.
+    """
+    with (
+        patch("rag_system.DocumentProcessor") as dp,
+        patch("rag_system.VectorStore", return_value=_fake_vector_store) as vs,
+        patch("rag_system.AIGenerator") as ai,
+        patch("rag_system.SessionManager") as sm,
+    ):
+        yield SimpleNamespace(dp=dp, vs=vs, ai=ai, sm=sm)
 
-    return mock_system
+
+@pytest.fixture(scope="module")
+def _system_proto(mock_config, rag_patches):
+    """RAGSystem wired from the patched components, constructed once per module."""
+    from rag_system import RAGSystem
+
+    return RAGSystem(mock_config)
 
 
 @pytest.fixture
-def test_app(mock_rag_system):
+def system(_system_proto):
     """
-    Create a test FastAPI app without static file mounting.
+    Shallow copy of the module's RAGSystem.
 
-    This fixture creates a minimal FastAPI app for testing API endpoints
-    without the static file middleware that requires actual frontend files.
+    Reassigning a component (system.ai_generator = ...) only affects this
+    test; mutating a shared component's attributes does not.
     """
-    from fastapi import FastAPI, HTTPException
-    from fastapi.middleware.cors import CORSMiddleware
-    from fastapi.middleware.trustedhost import TrustedHostMiddleware
-    from pydantic import BaseModel
-    from typing import List, Optional
-
-    # Pydantic models (matching app.py)
-    class QueryRequest(BaseModel):
-        query: str
-        session_id: Optional[str] = None
-
-    class SourceInfo(BaseModel):
-        text: str
-        url: Optional[str] = None
-
-    class QueryResponse(BaseModel):
-        answer: str
-        sources: List[SourceInfo]
-        session_id: str
-
-    class CourseStats(BaseModel):
-        total_courses: int
-        course_titles: List[str]
-
-    # Create test app
-    app = FastAPI(title="Test RAG System API")
-
-    # Add middleware (matching app.py)
-    app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
-    app.add_middleware(
+    return copy.copy(_system_proto)
+
+
+# ============================================================================
+# API Fixtures
+# ============================================================================
+
+
+# Pydantic models (matching app.py), defined once for every test app
+class QueryRequest(BaseModel):
+    query: str
+    session_id: Optional[str] = None
+
+
+class SourceInfo(BaseModel):
+    text: str
+    url: Optional[str] = None
+
+
+class QueryResponse(BaseModel):
+    answer: str
+    sources: List[SourceInfo]
+    session_id: str
+
+
+class CourseStats(BaseModel):
+    total_courses: int
+    course_titles: List[str]
+
+
+# Middleware stack shared by every test app. app.py also mounts TrustedHostMiddleware,
+# but with allowed_hosts=["*"] it never rejects a request, so tests skip it
+COMMON_MIDDLEWARE = [
+    Middleware(
         CORSMiddleware,
         allow_origins=["*"],
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
         expose_headers=["*"],
-    )
+    ),
+]
+
 
-    # Store the mock RAG system in app state for access in endpoints
-    app.state.rag_system = mock_rag_system
+def _build_app(title: str) -> FastAPI:
+    """
+    Build a FastAPI app mirroring app.py's API routes and CORS middleware.
+
+    Endpoints resolve the RAG system from app.state at request time, so one
+    app can serve any stub a fixture installs there.
+    """
+    app = FastAPI(title=title, middleware=COMMON_MIDDLEWARE)
 
     @app.post("/api/query", response_model=QueryResponse)
     async def query_documents(request: QueryRequest):
         """Process a query and return response with sources."""
         try:
+            rag_system = app.state.rag_system
             session_id = request.session_id
             if not session_id:
-                session_id = mock_rag_system.session_manager.create_session()
+                session_id = rag_system.session_manager.create_session()
 
-            answer, sources = mock_rag_system.query(request.query, session_id)
+            answer, sources = await rag_system.aquery(request.query, session_id)
 
-            return QueryResponse(
-                answer=answer,
-                sources=sources,
-                session_id=session_id
-            )
+            return QueryResponse(answer=answer, sources=sources, session_id=session_id)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
@@ -342,10 +623,10 @@ def test_app(mock_rag_system):
     async def get_course_stats():
         """Get course analytics and statistics."""
         try:
-            analytics = mock_rag_system.get_course_analytics()
+            analytics = app.state.rag_system.get_course_analytics()
             return CourseStats(
                 total_courses=analytics["total_courses"],
-                course_titles=analytics["course_titles"]
+                course_titles=analytics["course_titles"],
             )
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
@@ -358,160 +639,213 @@ def test_app(mock_rag_system):
     return app
 
 
+MOCK_QUERY_RESULT = (
+    "MCP is a protocol that enables AI to interact with external tools and data sources.",
+    [{"text": "MCP Course", "url": "https://example.com/mcp"}],
+)
+MOCK_COURSE_ANALYTICS = {
+    "total_courses": 3,
+    "course_titles": [
+        "MCP: Build Rich-Context AI Apps",
+        "Building AI Assistants with Claude",
+        "Advanced Prompt Engineering",
+    ],
+}
+
+
+@pytest.fixture(scope="session")
+def _mock_rag_system_singleton(request):
+    """Stubbed RAGSystem shared by the whole session; reset after every test."""
+    session_manager = SimpleNamespace(
+        create_session=Mock(),
+        get_conversation_history=Mock(),
+        add_exchange=Mock(),
+    )
+    mock_system = SimpleNamespace(
+        session_manager=session_manager,
+        aquery=AsyncMock(),
+        get_course_analytics=Mock(),
+    )
+    methods = (
+        session_manager.create_session,
+        session_manager.get_conversation_history,
+        session_manager.add_exchange,
+        mock_system.aquery,
+        mock_system.get_course_analytics,
+    )
+
+    def reset():
+        for method in methods:
+            method.reset_mock(return_value=True, side_effect=True)
+        session_manager.create_session.return_value = "test_session_123"
+        session_manager.get_conversation_history.return_value = None
+        # aquery coroutine - returns tuple of (response, sources)
+        mock_system.aquery.return_value = MOCK_QUERY_RESULT
+        mock_system.get_course_analytics.return_value = copy.deepcopy(MOCK_COURSE_ANALYTICS)
+
+    reset()
+    _register_shared_mock(request, reset)
+    return mock_system
+
+
 @pytest.fixture
-def client(test_app):
+def mock_rag_system(_mock_rag_system_singleton):
+    """The shared RAGSystem stub answering with canonical data."""
+    return _mock_rag_system_singleton
+
+
+@pytest.fixture(scope="session")
+def test_app():
     """
-    Create an AsyncHTTPClient for testing FastAPI endpoints.
+    Create a test FastAPI app without static file mounting.
 
-    Uses TestClient from FastAPI's Starlette for synchronous testing.
+    This fixture creates a minimal FastAPI app for testing API endpoints
+    without the static file middleware that requires actual frontend files.
+    The app is built once per session; endpoints read the RAG system from
+    app.state, which aclient or error_aclient replaces for every test.
     """
-    from fastapi.testclient import TestClient
-    return TestClient(test_app)
+    return _build_app("Test RAG System API")
 
 
-@pytest.fixture
-def sample_query_request():
-    """Sample query request payload."""
-    return {"query": "What is MCP?"}
+@pytest.fixture(scope="session")
+def app_module():
+    """
+    The real app.py module, imported once per session.
 
+    RAGSystem is patched so the import builds no vector store or API client,
+    and the frontend mount skips its directory check since tests run without
+    the built frontend. Tests only inspect the app; HTTP calls go to test_app.
+    """
+    from fastapi.staticfiles import StaticFiles
 
-@pytest.fixture
-def sample_query_request_with_session():
-    """Sample query request payload with session_id."""
-    return {
-        "query": "What is MCP?",
-        "session_id": "existing_session_456"
-    }
+    class _UncheckedStaticFiles(StaticFiles):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **{**kwargs, "check_dir": False})
 
+    with (
+        patch("rag_system.RAGSystem"),
+        patch("fastapi.staticfiles.StaticFiles", _UncheckedStaticFiles),
+    ):
+        import app
 
-@pytest.fixture
-def sample_query_response():
-    """Sample query response for assertion testing."""
-    return {
-        "answer": "MCP is a protocol that enables AI to interact with external tools and data sources.",
-        "sources": [
-            {"text": "MCP Course", "url": "https://example.com/mcp"}
-        ],
-        "session_id": "test_session_123"
-    }
+    return app
 
 
-@pytest.fixture
-def sample_courses_response():
-    """Sample courses response for assertion testing."""
-    return {
-        "total_courses": 3,
-        "course_titles": [
-            "MCP: Build Rich-Context AI Apps",
-            "Building AI Assistants with Claude",
-            "Advanced Prompt Engineering"
-        ]
-    }
+@pytest.fixture(scope="session")
+def anyio_backend():
+    """Run async tests and fixtures on asyncio, sharing one runner for the session."""
+    return "asyncio"
 
 
-@pytest.fixture
-def error_mock_rag_system():
-    """RAG system mock that raises errors for testing error handling."""
-    mock_system = Mock()
-    mock_system.session_manager = Mock()
-    mock_system.session_manager.create_session = Mock(return_value="error_session")
-
-    # Mock query that raises an exception
-    mock_system.query = Mock(side_effect=Exception("API key invalid"))
-
-    # Mock get_course_analytics that raises an exception
-    mock_system.get_course_analytics = Mock(
-        side_effect=Exception("Database connection failed")
-    )
+@pytest.fixture(scope="session")
+async def _session_aclient(test_app):
+    """httpx AsyncClient over an in-process ASGI transport, opened once per session."""
+    import httpx
 
-    return mock_system
+    transport = httpx.ASGITransport(app=test_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        yield async_client
 
 
 @pytest.fixture
-def error_app(error_mock_rag_system):
+def aclient(_session_aclient, test_app, mock_rag_system):
     """
-    Create a test FastAPI app that returns errors for testing error handling.
+    Async HTTP client for testing FastAPI endpoints.
+
+    Requests are dispatched straight into the app on the test's event loop, with
+    no TestClient portal thread in between. The client is shared across the
+    session; this fixture puts the canonical RAG system stub behind it.
     """
-    from fastapi import FastAPI, HTTPException
-    from fastapi.middleware.cors import CORSMiddleware
-    from fastapi.middleware.trustedhost import TrustedHostMiddleware
-    from pydantic import BaseModel
-    from typing import List, Optional
+    test_app.state.rag_system = mock_rag_system
+    return _session_aclient
 
-    class QueryRequest(BaseModel):
-        query: str
-        session_id: Optional[str] = None
 
-    class SourceInfo(BaseModel):
-        text: str
-        url: Optional[str] = None
+@pytest.fixture
+def error_aclient(_session_aclient, test_app, error_mock_rag_system):
+    """
+    Async HTTP client whose RAG system raises from every call.
 
-    class QueryResponse(BaseModel):
-        answer: str
-        sources: List[SourceInfo]
-        session_id: str
+    Only error-handling tests request it, so the failing stub is built lazily.
+    """
+    test_app.state.rag_system = error_mock_rag_system
+    return _session_aclient
+
+
+# Request payloads stay plain dicts: httpx's json= encoder rejects mappingproxy
+_SAMPLE_QUERY_REQUEST = {"query": "What is MCP?"}
+_SAMPLE_QUERY_REQUEST_WITH_SESSION = {
+    "query": "What is MCP?",
+    "session_id": "existing_session_456",
+}
+
+# Expected response bodies, built once and exposed read-only
+_SAMPLE_QUERY_RESPONSE = MappingProxyType(
+    {
+        "answer": MOCK_QUERY_RESULT[0],
+        "sources": MOCK_QUERY_RESULT[1],
+        "session_id": "test_session_123",
+    }
+)
+_SAMPLE_COURSES_RESPONSE = MappingProxyType(MOCK_COURSE_ANALYTICS)
 
-    class CourseStats(BaseModel):
-        total_courses: int
-        course_titles: List[str]
 
-    app = FastAPI(title="Test RAG System API - Error Mode")
+@pytest.fixture(scope="session")
+def query_request_model(app_module):
+    """The QueryRequest model app.py validates /api/query bodies with."""
+    return app_module.QueryRequest
 
-    app.add_middleware(TrustedHostMiddleware, allowed_hosts=["*"])
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-        expose_headers=["*"],
-    )
 
-    @app.post("/api/query", response_model=QueryResponse)
-    async def query_documents(request: QueryRequest):
-        try:
-            session_id = request.session_id or error_mock_rag_system.session_manager.create_session()
-            answer, sources = error_mock_rag_system.query(request.query, session_id)
-            return QueryResponse(answer=answer, sources=sources, session_id=session_id)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+@pytest.fixture(scope="session")
+def sample_query_request():
+    """Sample query request payload."""
+    return _SAMPLE_QUERY_REQUEST
 
-    @app.get("/api/courses", response_model=CourseStats)
-    async def get_course_stats():
-        try:
-            analytics = error_mock_rag_system.get_course_analytics()
-            return CourseStats(
-                total_courses=analytics["total_courses"],
-                course_titles=analytics["course_titles"]
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
 
-    @app.get("/")
-    async def root():
-        return {"status": "ok", "message": "RAG System API is running"}
+@pytest.fixture(scope="session")
+def sample_query_request_with_session():
+    """Sample query request payload with session_id."""
+    return _SAMPLE_QUERY_REQUEST_WITH_SESSION
 
-    return app
 
+@pytest.fixture(scope="session")
+def sample_query_response():
+    """Sample query response for assertion testing (read-only)."""
+    return _SAMPLE_QUERY_RESPONSE
 
-@pytest.fixture
-def error_client(error_app):
-    """Test client for error testing."""
-    from fastapi.testclient import TestClient
-    return TestClient(error_app)
 
+@pytest.fixture(scope="session")
+def sample_courses_response():
+    """Sample courses response for assertion testing (read-only)."""
+    return _SAMPLE_COURSES_RESPONSE
 
-# ============================================================================
-# pytest configuration
-# ============================================================================
 
-def pytest_configure(config):
-    """Configure pytest markers."""
-    config.addinivalue_line(
-        "markers", "integration: marks tests as integration tests (may require real dependencies)"
-    )
-    config.addinivalue_line("markers", "unit: marks tests as unit tests (isolated, mocked)")
-    config.addinivalue_line(
-        "markers", "slow: marks tests as slow (may require network or heavy computation)"
+@pytest.fixture(scope="session")
+def _error_mock_rag_system_singleton(request):
+    """Failing RAGSystem stub shared by the whole session; reset after every test."""
+    mock_system = SimpleNamespace(
+        session_manager=SimpleNamespace(create_session=Mock()),
+        aquery=AsyncMock(),
+        get_course_analytics=Mock(),
     )
-    config.addinivalue_line("markers", "api: marks tests as API endpoint tests")
+
+    def reset():
+        for method in (
+            mock_system.session_manager.create_session,
+            mock_system.aquery,
+            mock_system.get_course_analytics,
+        ):
+            method.reset_mock(return_value=True, side_effect=True)
+        mock_system.session_manager.create_session.return_value = "error_session"
+        # Query and analytics calls both fail
+        mock_system.aquery.side_effect = Exception("API key invalid")
+        mock_system.get_course_analytics.side_effect = Exception("Database connection failed")
+
+    reset()
+    _register_shared_mock(request, reset)
+    return mock_system
+
+
+@pytest.fixture
+def error_mock_rag_system(_error_mock_rag_system_singleton):
+    """The shared failing RAGSystem stub."""
+    return _error_mock_rag_system_singleton
@@ -0,0 +1,48 @@
+"""
+Integration tests for RAGSystem in rag_system.py.
+
+Tests the end-to-end query flow when Claude uses a tool. Deselected by the
+default run; select with `pytest -m integration`.
+"""
+
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+
+@pytest.mark.integration
+class TestRAGSystemEndToEnd:
+    """End-to-end integration tests with more realistic mocks."""
+
+    def test_full_query_flow_with_tool_use(
+        self,
+        system,
+        ai_generator_with_mock,
+        mock_vector_store,
+        make_tool_use_response,
+        make_final_response,
+        sequence,
+    ):
+        """Test the full query flow when Claude uses a tool."""
+        # First call asks for a search, the second answers from its results
+        client = ai_generator_with_mock.client
+        client.messages.create = AsyncMock(
+            side_effect=sequence(
+                make_tool_use_response("search_course_content", {"query": "MCP"}, "toolu_123"),
+                make_final_response("MCP is a protocol..."),
+            )
+        )
+        system.ai_generator = ai_generator_with_mock
+
+        response, sources = asyncio.run(system.aquery("What is MCP?"))
+
+        assert response == "MCP is a protocol..."
+        assert client.messages.create.call_count == 2
+        # The search tool ran against the vector store and its sources came back
+        assert [c["query"] for c in mock_vector_store.search_calls] == ["MCP"]
+        assert sources
+        assert all("text" in source and "url" in source for source in sources)
+        # The tool output was sent back to Claude after its tool_use turn
+        messages = client.messages.create.call_args.kwargs["messages"]
+        assert messages[2]["content"][0]["tool_use_id"] == "toolu_123"
@@ -10,9 +10,48 @@ Tests the generate_response method and sequential tool calling behavior:
 - Termination conditions (max rounds, no tool use, errors)
 """
 
+import asyncio
+
 import pytest
-from unittest.mock import Mock, MagicMock, patch, call
-from ai_generator import AIGenerator
+from unittest.mock import AsyncMock, Mock, MagicMock, patch, call
+from ai_generator import AIGenerator, ToolResult
+from search_tools import ToolManager
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _patch_anthropic():
+    """Patch the AsyncAnthropic client class once for the whole module."""
+    with patch("ai_generator.anthropic.AsyncAnthropic") as mock_anthropic:
+        yield mock_anthropic
+
+
+@pytest.fixture
+def mock_anthropic(_patch_anthropic):
+    """The module-wide AsyncAnthropic class patch, with calls and return value reset."""
+    _patch_anthropic.reset_mock(return_value=True, side_effect=True)
+    return _patch_anthropic
+
+
+@pytest.fixture(scope="module")
+def generator_ro(_patch_anthropic, mock_config):
+    """One AIGenerator shared by tests that never reassign or reconfigure it."""
+    return AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
+
+
+@pytest.fixture(scope="class")
+def seq_gen(_patch_anthropic, mock_config):
+    """
+    One generator per test class; each test installs its own client.
+
+    The response cache is disabled so a direct answer cached by one test can
+    never satisfy another.
+    """
+    return AIGenerator(
+        mock_config.ANTHROPIC_API_KEY,
+        mock_config.ANTHROPIC_MODEL,
+        max_tool_rounds=2,
+        response_cache_size=0,
+    )
 
 
 @pytest.mark.unit
@@ -21,32 +60,37 @@ class TestAIGeneratorInit:
 
     def test_init_with_valid_params(self, mock_config):
         """Test initialization with valid parameters."""
-        with patch("ai_generator.anthropic.Anthropic"):
-            generator = AIGenerator(
-                mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL, max_tool_rounds=2
-            )
+        generator = AIGenerator(
+            mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL, max_tool_rounds=2
+        )
 
-            assert generator.model == mock_config.ANTHROPIC_MODEL
-            assert generator.client is not None
-            assert generator.max_tool_rounds == 2
+        assert generator.model == mock_config.ANTHROPIC_MODEL
+        assert generator.client is not None
+        assert generator.max_tool_rounds == 2
 
     def test_init_with_custom_max_rounds(self, mock_config):
         """Test initialization with custom max_tool_rounds."""
-        with patch("ai_generator.anthropic.Anthropic"):
-            generator = AIGenerator(
-                mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL, max_tool_rounds=5
-            )
+        generator = AIGenerator(
+            mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL, max_tool_rounds=5
+        )
 
-            assert generator.max_tool_rounds == 5
+        assert generator.max_tool_rounds == 5
 
-    def test_base_params_setup(self, mock_config):
-        """Test that base parameters are set up correctly."""
-        with patch("ai_generator.anthropic.Anthropic"):
-            generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
+    def test_each_generator_owns_its_client(self, mock_anthropic, mock_config):
+        """Test that every generator builds its own AsyncAnthropic client."""
+        mock_anthropic.side_effect = lambda **kwargs: MagicMock()
+
+        first = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
+        second = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
 
-            assert generator.base_params["model"] == mock_config.ANTHROPIC_MODEL
-            assert generator.base_params["temperature"] == 0
-            assert generator.base_params["max_tokens"] == 800
+        assert first.client is not second.client
+        mock_anthropic.assert_called_with(api_key=mock_config.ANTHROPIC_API_KEY, max_retries=2)
+
+    def test_base_params_setup(self, generator_ro, mock_config):
+        """Test that base parameters are set up correctly."""
+        assert generator_ro.base_params["model"] == mock_config.ANTHROPIC_MODEL
+        assert generator_ro.base_params["temperature"] == 0
+        assert generator_ro.base_params["max_tokens"] == 800
 
 
 @pytest.mark.unit
@@ -55,481 +99,791 @@ class TestGenerateResponseNoTools:
 
     def test_direct_answer_response(self, ai_generator_with_mock):
         """Test that a direct answer is returned when no tool use is needed."""
-        response = ai_generator_with_mock.generate_response("What is Python?")
+        response = asyncio.run(ai_generator_with_mock.generate_response("What is Python?"))
 
         assert response is not None
         assert isinstance(response, str)
         assert "test response" in response.lower()
 
+    def test_no_tools_call_uses_canonical_kwargs(self, ai_generator_with_mock, mock_config):
+        """Test that the pure-chat path sends exactly the pinned request fields."""
+        asyncio.run(ai_generator_with_mock.generate_response("What is Python?"))
+
+        kwargs = ai_generator_with_mock.client.messages.create.call_args.kwargs
+        assert set(kwargs) == {"model", "temperature", "max_tokens", "messages", "system"}
+        assert kwargs["model"] == mock_config.ANTHROPIC_MODEL
+        assert kwargs["temperature"] == 0
+        assert kwargs["max_tokens"] == 800
+
     def test_system_prompt_passed_without_history(self, ai_generator_with_mock, mock_config):
         """Test that system prompt is passed correctly without conversation history."""
-        ai_generator_with_mock.generate_response("Test query")
+        asyncio.run(ai_generator_with_mock.generate_response("Test query"))
 
         # Check that the API was called
         ai_generator_with_mock.client.messages.create.assert_called_once()
-        call_args = ai_generator_with_mock.client.messages.create.call_args
-        assert "system" in call_args.kwargs
-        assert AIGenerator.SYSTEM_PROMPT in call_args.kwargs["system"]
+        kwargs = ai_generator_with_mock.client.messages.create.call_args.kwargs
+        assert "system" in kwargs
+        system = kwargs["system"]
+        assert len(system) == 1
+        assert system[0]["text"] == AIGenerator.SYSTEM_PROMPT
+        assert system[0]["cache_control"] == {"type": "ephemeral"}
 
     def test_system_prompt_passed_with_history(self, ai_generator_with_mock):
         """Test that system prompt includes conversation history."""
         history = "User: Hi\nAI: Hello"
-        ai_generator_with_mock.generate_response("Test query", conversation_history=history)
+        asyncio.run(
+            ai_generator_with_mock.generate_response("Test query", conversation_history=history)
+        )
+
+        kwargs = ai_generator_with_mock.client.messages.create.call_args.kwargs
+        assert "system" in kwargs
+        system = kwargs["system"]
+        # Cached prompt block stays first so history never breaks the cache prefix
+        assert system[0]["text"] == AIGenerator.SYSTEM_PROMPT
+        assert "cache_control" in system[0]
+        assert history in system[1]["text"]
+        assert "cache_control" not in system[1]
+
+    def test_history_free_system_content_is_reused(self, ai_generator_with_mock):
+        """Test that requests without history share one prebuilt system list."""
+        asyncio.run(ai_generator_with_mock.generate_response("First query"))
+        asyncio.run(ai_generator_with_mock.generate_response("Second query"))
 
-        call_args = ai_generator_with_mock.client.messages.create.call_args
-        assert "system" in call_args.kwargs
-        assert AIGenerator.SYSTEM_PROMPT in call_args.kwargs["system"]
-        assert history in call_args.kwargs["system"]
+        first, second = ai_generator_with_mock.client.messages.create.call_args_list
+        assert first.kwargs["system"] is second.kwargs["system"]
 
     def test_no_tools_without_tools_param(self, ai_generator_with_mock):
         """Test that tools are not added when not provided."""
-        ai_generator_with_mock.generate_response("What is Python?")
+        asyncio.run(ai_generator_with_mock.generate_response("What is Python?"))
 
-        call_args = ai_generator_with_mock.client.messages.create.call_args
+        kwargs = ai_generator_with_mock.client.messages.create.call_args.kwargs
         # Tools should not be in the call
-        assert "tools" not in call_args.kwargs or call_args.kwargs.get("tools") is None
+        assert "tools" not in kwargs or kwargs.get("tools") is None
 
 
 @pytest.mark.unit
 class TestSingleToolUse:
     """Test single tool use (one round)."""
 
-    def test_single_tool_use_flow(self, mock_config, tool_manager):
+    def test_single_tool_use_flow(
+        self,
+        mock_anthropic,
+        mock_config,
+        tool_manager,
+        make_tool_use_response,
+        make_final_response,
+        sequence,
+        tool_defs,
+    ):
         """Test a single tool use followed by final answer."""
-        with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
-            mock_client = MagicMock()
-
-            # First call: tool use
-            tool_use_response = MagicMock()
-            tool_use_response.stop_reason = "tool_use"
-            mock_tool_use = MagicMock()
-            mock_tool_use.type = "tool_use"
-            mock_tool_use.id = "toolu_123"
-            mock_tool_use.name = "search_course_content"
-            mock_tool_use.input = {"query": "MCP"}
-            tool_use_response.content = [mock_tool_use]
-
-            # Second call: final answer (no tool use)
-            final_response = MagicMock()
-            final_response.stop_reason = "stop"
-            mock_content = MagicMock()
-            mock_content.text = "MCP is a protocol for AI tools."
-            final_response.content = [mock_content]
-
-            mock_client.messages.create = Mock(side_effect=[tool_use_response, final_response])
-            mock_anthropic.return_value = mock_client
-
-            generator = AIGenerator(
-                mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL, max_tool_rounds=2
+        mock_client = MagicMock()
+
+        # First call: tool use
+        tool_use_response = make_tool_use_response(
+            "search_course_content", {"query": "MCP"}, "toolu_123"
+        )
+
+        # Second call: final answer (no tool use)
+        final_response = make_final_response("MCP is a protocol for AI tools.")
+
+        mock_client.messages.create = AsyncMock(
+            side_effect=sequence(tool_use_response, final_response)
+        )
+        mock_anthropic.return_value = mock_client
+
+        generator = AIGenerator(
+            mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL, max_tool_rounds=2
+        )
+        generator.client = mock_client
+
+        tool_manager.execute_tool = Mock(return_value="Search results")
+
+        result = asyncio.run(
+            generator.generate_response("What is MCP?", tools=tool_defs, tool_manager=tool_manager)
+        )
+
+        # Should have called API twice (tool use + final)
+        assert mock_client.messages.create.call_count == 2
+        # Tool was executed once
+        tool_manager.execute_tool.assert_called_once()
+        assert "protocol" in result.lower()
+
+    def test_last_tool_marked_for_prompt_caching(self, ai_generator_with_tool_use, tool_manager):
+        """Test that the last tool definition carries a cache breakpoint."""
+        tools = [tool.get_tool_definition() for tool in tool_manager.tools.values()]
+        tool_manager.execute_tool = Mock(return_value="Search results")
+
+        asyncio.run(
+            ai_generator_with_tool_use.generate_response(
+                "What is MCP?", tools=tools, tool_manager=tool_manager
             )
-            generator.client = mock_client
+        )
+
+        first_call = ai_generator_with_tool_use.client.messages.create.call_args_list[0]
+        sent_tools = first_call.kwargs["tools"]
+        assert sent_tools[-1]["cache_control"] == {"type": "ephemeral"}
+        assert all("cache_control" not in tool for tool in sent_tools[:-1])
+        # Caller's definitions are left untouched
+        assert "cache_control" not in tools[-1]
+
+    def test_premarked_tools_sent_as_is(self, ai_generator_with_tool_use, tool_manager):
+        """Test that definitions already carrying a breakpoint are not copied again."""
+        tools = tool_manager.get_tool_definitions()
+        tool_manager.execute_tool = Mock(return_value="Search results")
+
+        asyncio.run(
+            ai_generator_with_tool_use.generate_response(
+                "What is MCP?", tools=tools, tool_manager=tool_manager
+            )
+        )
+
+        first_call = ai_generator_with_tool_use.client.messages.create.call_args_list[0]
+        assert first_call.kwargs["tools"] is tools
+
+    def test_token_efficient_tools_header_for_supported_model(
+        self, mock_anthropic, mock_anthropic_client, tool_manager
+    ):
+        """Test that 3.7 Sonnet tool calls opt into the token-efficient tools beta."""
+        mock_anthropic.return_value = mock_anthropic_client
+        generator = AIGenerator("test-key", "claude-3-7-sonnet-20250219")
+
+        asyncio.run(
+            generator.generate_response(
+                "What is MCP?", tools=tool_manager.get_tool_definitions(), tool_manager=tool_manager
+            )
+        )
 
-            tool_manager.execute_tool = Mock(return_value="Search results")
+        call_kwargs = mock_anthropic_client.messages.create.call_args.kwargs
+        assert call_kwargs["extra_headers"] == {
+            "anthropic-beta": AIGenerator.TOKEN_EFFICIENT_TOOLS_BETA
+        }
 
-            result = generator.generate_response(
+    def test_token_efficient_tools_header_omitted(self, ai_generator_with_mock, tool_manager):
+        """Test that unsupported models and tool-free calls send no beta header."""
+        asyncio.run(
+            ai_generator_with_mock.generate_response(
                 "What is MCP?", tools=tool_manager.get_tool_definitions(), tool_manager=tool_manager
             )
+        )
+        asyncio.run(ai_generator_with_mock.generate_response("What is Python?"))
 
-            # Should have called API twice (tool use + final)
-            assert mock_client.messages.create.call_count == 2
-            # Tool was executed once
-            tool_manager.execute_tool.assert_called_once()
-            assert "protocol" in result.lower()
+        for call_args in ai_generator_with_mock.client.messages.create.call_args_list:
+            assert "extra_headers" not in call_args.kwargs
 
-    def test_tools_added_to_api_call(self, ai_generator_with_mock, tool_manager):
-        """Test that tools are added to the API call when provided."""
-        ai_generator_with_mock.generate_response(
-            "What is MCP?", tools=tool_manager.get_tool_definitions()
+    def test_tools_added_to_api_call(self, ai_generator_with_mock, tool_manager, tool_defs):
+        """Test that tools are added to the API call when provided with a tool manager."""
+        asyncio.run(
+            ai_generator_with_mock.generate_response(
+                "What is MCP?", tools=tool_defs, tool_manager=tool_manager
+            )
         )
 
-        call_args = ai_generator_with_mock.client.messages.create.call_args
-        assert "tools" in call_args.kwargs
-        assert "tool_choice" in call_args.kwargs
-        assert call_args.kwargs["tool_choice"] == {"type": "auto"}
+        kwargs = ai_generator_with_mock.client.messages.create.call_args.kwargs
+        assert [tool["name"] for tool in kwargs["tools"]] == [tool["name"] for tool in tool_defs]
+        assert kwargs["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+        assert kwargs["tool_choice"] == {"type": "auto"}
 
 
 @pytest.mark.unit
 class TestSequentialToolCalling:
     """Test sequential tool calling (multiple rounds)."""
 
-    def test_two_round_sequential_tool_calls(self, mock_config, tool_manager):
+    def test_two_round_sequential_tool_calls(
+        self,
+        seq_gen,
+        tool_manager,
+        make_tool_use_response,
+        make_final_response,
+        sequence,
+        tool_defs,
+    ):
         """Test two sequential tool calls (outline then search)."""
-        with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
-            mock_client = MagicMock()
-
-            # Round 1: Claude calls get_course_outline
-            outline_response = MagicMock()
-            outline_response.stop_reason = "tool_use"
-            mock_outline_tool = MagicMock()
-            mock_outline_tool.type = "tool_use"
-            mock_outline_tool.id = "toolu_111"
-            mock_outline_tool.name = "get_course_outline"
-            mock_outline_tool.input = {"course_name": "MCP"}
-            outline_response.content = [mock_outline_tool]
-
-            # Round 2: Claude calls search_course_content
-            search_response = MagicMock()
-            search_response.stop_reason = "tool_use"
-            mock_search_tool = MagicMock()
-            mock_search_tool.type = "tool_use"
-            mock_search_tool.id = "toolu_222"
-            mock_search_tool.name = "search_course_content"
-            mock_search_tool.input = {"query": "Building MCP Servers"}
-            search_response.content = [mock_search_tool]
-
-            # Final: Claude synthesizes answer
-            final_response = MagicMock()
-            final_response.stop_reason = "stop"
-            mock_final_content = MagicMock()
-            mock_final_content.text = "Based on the outline and search, here's what I found..."
-            final_response.content = [mock_final_content]
-
-            # Set up call sequence
-            mock_client.messages.create = Mock(
-                side_effect=[outline_response, search_response, final_response]
-            )
-            mock_anthropic.return_value = mock_client
+        mock_client = MagicMock()
 
-            generator = AIGenerator(
-                mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL, max_tool_rounds=2
-            )
-            generator.client = mock_client
+        # Round 1: Claude calls get_course_outline
+        outline_response = make_tool_use_response(
+            "get_course_outline", {"course_name": "MCP"}, "toolu_111"
+        )
+
+        # Round 2: Claude calls search_course_content
+        search_response = make_tool_use_response(
+            "search_course_content", {"query": "Building MCP Servers"}, "toolu_222"
+        )
+
+        # Final: Claude synthesizes answer
+        final_response = make_final_response(
+            "Based on the outline and search, here's what I found..."
+        )
+
+        # Set up call sequence
+        mock_client.messages.create = AsyncMock(
+            side_effect=sequence(outline_response, search_response, final_response)
+        )
 
-            # Mock tool manager to return different results per call
-            tool_results = ["Lesson 4: Building MCP Servers", "Search results about servers"]
-            tool_manager.execute_tool = Mock(side_effect=tool_results)
+        seq_gen.client = mock_client
 
-            result = generator.generate_response(
+        # Mock tool manager to return different results per call
+        tool_results = ["Lesson 4: Building MCP Servers", "Search results about servers"]
+        tool_manager.execute_tool = Mock(side_effect=tool_results)
+
+        result = asyncio.run(
+            seq_gen.generate_response(
                 "What does lesson 4 of MCP cover, and are there similar courses?",
-                tools=tool_manager.get_tool_definitions(),
+                tools=tool_defs,
                 tool_manager=tool_manager,
             )
+        )
 
-            # Should have called API 3 times (2 tool rounds + 1 final)
-            assert mock_client.messages.create.call_count == 3
-            # Both tools were executed
-            assert tool_manager.execute_tool.call_count == 2
-            # Result contains the synthesized answer
-            assert "found" in result.lower()
-
-    def test_max_rounds_termination(self, mock_config, tool_manager):
+        # Should have called API 3 times (2 tool rounds + 1 final)
+        assert mock_client.messages.create.call_count == 3
+        # Both tools were executed
+        assert tool_manager.execute_tool.call_count == 2
+        # Result contains the synthesized answer
+        assert "found" in result.lower()
+
+    def test_max_rounds_termination(
+        self,
+        seq_gen,
+        tool_manager,
+        make_tool_use_response,
+        make_final_response,
+        sequence,
+        tool_defs,
+    ):
         """Test that tool calling stops after max_rounds is reached."""
-        with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
-            mock_client = MagicMock()
-
-            # All responses request tool use
-            def create_tool_response():
-                resp = MagicMock()
-                resp.stop_reason = "tool_use"
-                mock_tool = MagicMock()
-                mock_tool.type = "tool_use"
-                mock_tool.id = "toolu_xxx"
-                mock_tool.name = "search_course_content"
-                mock_tool.input = {"query": "test"}
-                resp.content = [mock_tool]
-                return resp
-
-            tool_responses = [create_tool_response() for _ in range(3)]
-            # Final response for forced synthesis
-            final_response = MagicMock()
-            final_response.stop_reason = "stop"
-            mock_final_content = MagicMock()
-            mock_final_content.text = "I've gathered information from multiple searches."
-            final_response.content = [mock_final_content]
-
-            # 3 tool calls + 1 final synthesis
-            mock_client.messages.create = Mock(side_effect=tool_responses + [final_response])
-            mock_anthropic.return_value = mock_client
-
-            generator = AIGenerator(
-                mock_config.ANTHROPIC_API_KEY,
-                mock_config.ANTHROPIC_MODEL,
-                max_tool_rounds=2,  # Limit to 2 rounds
-            )
-            generator.client = mock_client
+        mock_client = MagicMock()
+
+        # All responses request tool use
+        tool_responses = [
+            make_tool_use_response("search_course_content", {"query": "test"}, "toolu_xxx")
+            for _ in range(3)
+        ]
+        # Final response for forced synthesis
+        final_response = make_final_response("I've gathered information from multiple searches.")
+
+        # 3 tool calls + 1 final synthesis
+        mock_client.messages.create = AsyncMock(
+            side_effect=sequence(*tool_responses, final_response)
+        )
+
+        seq_gen.client = mock_client
 
-            tool_manager.execute_tool = Mock(return_value="Results")
+        tool_manager.execute_tool = Mock(return_value="Results")
 
-            result = generator.generate_response(
+        result = asyncio.run(
+            seq_gen.generate_response(
                 "Keep searching for more information",
-                tools=tool_manager.get_tool_definitions(),
+                tools=tool_defs,
                 tool_manager=tool_manager,
             )
+        )
 
-            # Should stop after 2 rounds + 1 final = 3 API calls
-            assert mock_client.messages.create.call_count == 3
+        # 2 executed rounds, the third tool request, then 1 forced synthesis
+        assert mock_client.messages.create.call_count == 4
+        assert "tools" not in mock_client.messages.create.call_args.kwargs
+        # The repeated identical call is answered from the request's tool memo
+        tool_manager.execute_tool.assert_called_once()
+        assert result == "I've gathered information from multiple searches."
 
-    def test_early_termination_no_tool_use(self, mock_config, tool_manager):
+    def test_early_termination_no_tool_use(self, seq_gen, tool_manager, tool_defs):
         """Test that tool calling stops early when Claude doesn't request tools."""
-        with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
-            mock_client = MagicMock()
+        mock_client = MagicMock()
 
-            # First response: direct answer (no tool use)
-            direct_response = MagicMock()
-            direct_response.stop_reason = "stop"
-            mock_content = MagicMock()
-            mock_content.text = "Python is a programming language."
-            direct_response.content = [mock_content]
+        # First response: direct answer (no tool use)
+        direct_response = MagicMock()
+        direct_response.stop_reason = "stop"
+        mock_content = MagicMock()
+        mock_content.text = "Python is a programming language."
+        direct_response.content = [mock_content]
 
-            mock_client.messages.create = Mock(return_value=direct_response)
-            mock_anthropic.return_value = mock_client
+        mock_client.messages.create = AsyncMock(return_value=direct_response)
 
-            generator = AIGenerator(
-                mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL, max_tool_rounds=2
-            )
-            generator.client = mock_client
+        seq_gen.client = mock_client
+        tool_manager.execute_tool = Mock()
 
-            result = generator.generate_response(
+        result = asyncio.run(
+            seq_gen.generate_response(
                 "What is Python?",
-                tools=tool_manager.get_tool_definitions(),
+                tools=tool_defs,
                 tool_manager=tool_manager,
             )
+        )
 
-            # Should only call API once (no tool use)
-            assert mock_client.messages.create.call_count == 1
-            # No tools executed
-            tool_manager.execute_tool.assert_not_called()
-            assert "programming language" in result.lower()
+        # Should only call API once (no tool use)
+        assert mock_client.messages.create.call_count == 1
+        # No tools executed
+        tool_manager.execute_tool.assert_not_called()
+        assert "programming language" in result.lower()
 
 
 @pytest.mark.unit
 class TestToolExecutionErrors:
     """Test error handling during tool execution."""
 
-    def test_tool_execution_error_terminates_gracefully(self, mock_config, tool_manager):
+    def test_tool_execution_error_terminates_gracefully(
+        self,
+        mock_anthropic,
+        mock_config,
+        tool_manager,
+        make_tool_use_response,
+        make_final_response,
+        tool_defs,
+    ):
         """Test that tool execution errors force final synthesis with error info."""
-        with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
-            mock_client = MagicMock()
-
-            # Tool use response
-            tool_use_response = MagicMock()
-            tool_use_response.stop_reason = "tool_use"
-            mock_tool = MagicMock()
-            mock_tool.type = "tool_use"
-            mock_tool.id = "toolu_123"
-            mock_tool.name = "search_course_content"
-            mock_tool.input = {"query": "test"}
-            tool_use_response.content = [mock_tool]
-
-            # Final synthesis response
-            final_response = MagicMock()
-            final_response.stop_reason = "stop"
-            mock_content = MagicMock()
-            mock_content.text = "I encountered an error while searching."
-            final_response.content = [mock_content]
-
-            mock_client.messages.create = Mock(side_effect=[tool_use_response, final_response])
-            mock_anthropic.return_value = mock_client
-
-            generator = AIGenerator(
-                mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL, max_tool_rounds=2
-            )
-            generator.client = mock_client
+        mock_client = MagicMock()
+
+        # Tool use response
+        tool_use_response = make_tool_use_response(
+            "search_course_content", {"query": "test"}, "toolu_123"
+        )
+
+        # Final synthesis response
+        final_response = make_final_response("I encountered an error while searching.")
+
+        mock_client.messages.create = AsyncMock(side_effect=[tool_use_response, final_response])
+        mock_anthropic.return_value = mock_client
+
+        generator = AIGenerator(
+            mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL, max_tool_rounds=2
+        )
+        generator.client = mock_client
 
-            # Tool execution raises exception
-            tool_manager.execute_tool = Mock(side_effect=Exception("Tool failed"))
+        # Tool execution raises exception
+        tool_manager.execute_tool = Mock(side_effect=Exception("Tool failed"))
 
-            result = generator.generate_response(
+        result = asyncio.run(
+            generator.generate_response(
                 "Search for something",
-                tools=tool_manager.get_tool_definitions(),
+                tools=tool_defs,
                 tool_manager=tool_manager,
             )
+        )
+
+        # Should call API twice (tool use + final synthesis)
+        assert mock_client.messages.create.call_count == 2
+        # Should return a response despite the error
+        assert result is not None
 
-            # Should call API twice (tool use + final synthesis)
-            assert mock_client.messages.create.call_count == 2
-            # Should return a response despite the error
-            assert result is not None
+
+def _stub_tool_manager(**execute_tool):
+    """ToolManager stand-in whose tools track no sources, so every call may run in parallel."""
+    tool_manager = Mock(spec=ToolManager)
+    tool_manager.tracks_sources.return_value = False
+    tool_manager.execute_tool = Mock(**execute_tool)
+    return tool_manager
 
 
 @pytest.mark.unit
 class TestExecuteToolsFromResponse:
     """Test the _execute_tools_from_response helper method."""
 
-    def test_execute_single_tool(self, mock_config):
+    def test_execute_single_tool(self, generator_ro, make_tool_use_response):
         """Test executing a single tool from a response."""
-        with patch("ai_generator.anthropic.Anthropic"):
-            generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
-
-            # Create mock response with tool use
-            response = MagicMock()
-            mock_tool = MagicMock()
-            mock_tool.type = "tool_use"
-            mock_tool.id = "toolu_123"
-            mock_tool.name = "test_tool"
-            mock_tool.input = {"arg": "value"}
-            response.content = [mock_tool]
-
-            tool_manager = Mock()
-            tool_manager.execute_tool = Mock(return_value="Tool result")
-
-            results, had_error = generator._execute_tools_from_response(response, tool_manager)
-
-            assert len(results) == 1
-            assert results[0]["type"] == "tool_result"
-            assert results[0]["tool_use_id"] == "toolu_123"
-            assert results[0]["content"] == "Tool result"
-            assert had_error is False
-
-    def test_execute_multiple_tools(self, mock_config):
+        # Create stub response with tool use
+        response = make_tool_use_response("test_tool", {"arg": "value"}, "toolu_123")
+
+        tool_manager = _stub_tool_manager(return_value="Tool result")
+
+        results, had_error = asyncio.run(
+            generator_ro._execute_tools_from_response(response, tool_manager)
+        )
+
+        assert len(results) == 1
+        assert results[0]["type"] == "tool_result"
+        assert results[0]["tool_use_id"] == "toolu_123"
+        assert results[0]["content"] == "Tool result"
+        assert had_error is False
+
+    def test_execute_multiple_tools(self, generator_ro, stubs):
         """Test executing multiple tools from a response."""
-        with patch("ai_generator.anthropic.Anthropic"):
-            generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
+        # Create stub response with 2 tools
+        response = stubs.Response(
+            "tool_use",
+            [
+                stubs.ToolUse("toolu_1", "tool1", {"query": "test1"}),
+                stubs.ToolUse("toolu_2", "tool2", {"query": "test2"}),
+            ],
+        )
+
+        tool_manager = _stub_tool_manager(return_value="Result")
+
+        results, had_error = asyncio.run(
+            generator_ro._execute_tools_from_response(response, tool_manager)
+        )
+
+        assert len(results) == 2
+        assert tool_manager.execute_tool.call_count == 2
+        assert had_error is False
+
+    def test_parallel_results_keep_block_order(self, generator_ro, stubs):
+        """Test that results follow tool_use order even when tools finish out of order."""
+        import threading
+
+        response = stubs.Response(
+            "tool_use",
+            [
+                stubs.ToolUse("toolu_slow", "slow_tool", {}),
+                stubs.ToolUse("toolu_fast", "fast_tool", {}),
+            ],
+        )
+
+        fast_done = threading.Event()
 
-            # Create mock response with 2 tools
-            response = MagicMock()
-            tool1 = MagicMock()
-            tool1.type = "tool_use"
-            tool1.id = "toolu_1"
-            tool1.name = "tool1"
-            tool1.input = {"query": "test1"}
+        def execute_tool(name, **kwargs):
+            if name == "slow_tool":
+                # Only finishes once the second tool has run, proving overlap
+                assert fast_done.wait(timeout=5)
+            else:
+                fast_done.set()
+            return f"{name} result"
 
-            tool2 = MagicMock()
-            tool2.type = "tool_use"
-            tool2.id = "toolu_2"
-            tool2.name = "tool2"
-            tool2.input = {"query": "test2"}
+        tool_manager = _stub_tool_manager(side_effect=execute_tool)
 
-            response.content = [tool1, tool2]
+        results, had_error = asyncio.run(
+            generator_ro._execute_tools_from_response(response, tool_manager)
+        )
 
-            tool_manager = Mock()
-            tool_manager.execute_tool = Mock(return_value="Result")
+        assert [r["tool_use_id"] for r in results] == ["toolu_slow", "toolu_fast"]
+        assert results[0]["content"] == "slow_tool result"
+        assert had_error is False
+
+    def test_source_tracking_calls_run_in_block_order(self, generator_ro, stubs):
+        """Test that calls to source-tracking tools share one sequential unit."""
+        response = stubs.Response(
+            "tool_use",
+            [
+                stubs.ToolUse("toolu_1", "search_course_content", {"query": "first"}),
+                stubs.ToolUse("toolu_2", "get_course_outline", {"course_name": "MCP"}),
+                stubs.ToolUse("toolu_3", "search_course_content", {"query": "second"}),
+            ],
+        )
+        tool_manager = _stub_tool_manager(return_value="Result")
+        tool_manager.tracks_sources.side_effect = lambda name: name == "search_course_content"
+
+        _, pending = generator_ro._pending_tool_calls(response.content, {})
+        units = generator_ro._tool_units(pending, tool_manager)
+        asyncio.run(generator_ro._execute_tools_from_response(response, tool_manager))
+
+        assert [[pending[key].id for key in unit] for unit in units] == [
+            ["toolu_1", "toolu_3"],
+            ["toolu_2"],
+        ]
+        searches = [
+            c.kwargs["query"]
+            for c in tool_manager.execute_tool.call_args_list
+            if c.args[0] == "search_course_content"
+        ]
+        assert searches == ["first", "second"]
+
+    def test_duplicate_calls_in_one_turn_run_once(self, generator_ro, stubs):
+        """Test that identical tool_use blocks share a single execution."""
+        response = stubs.Response(
+            "tool_use",
+            [
+                stubs.ToolUse(tool_id, "search_course_content", {"query": "MCP"})
+                for tool_id in ("toolu_1", "toolu_2")
+            ],
+        )
 
-            results, had_error = generator._execute_tools_from_response(response, tool_manager)
+        tool_manager = _stub_tool_manager(return_value="Result")
+
+        results, had_error = asyncio.run(
+            generator_ro._execute_tools_from_response(response, tool_manager)
+        )
+
+        tool_manager.execute_tool.assert_called_once_with("search_course_content", query="MCP")
+        assert [r["tool_use_id"] for r in results] == ["toolu_1", "toolu_2"]
+        assert all(r["content"] == "Result" for r in results)
+
+    def test_memo_reused_across_rounds(self, generator_ro, tool_use_response):
+        """Test that a call repeated in a later round is answered from the request memo."""
+        tool_manager = _stub_tool_manager(return_value="Result")
+        tool_memo = {}
+
+        asyncio.run(
+            generator_ro._execute_tools_from_response(tool_use_response, tool_manager, tool_memo)
+        )
+        results, _ = asyncio.run(
+            generator_ro._execute_tools_from_response(tool_use_response, tool_manager, tool_memo)
+        )
 
-            assert len(results) == 2
-            assert tool_manager.execute_tool.call_count == 2
-            assert had_error is False
+        tool_manager.execute_tool.assert_called_once()
+        assert results[0]["content"] == "Result"
 
-    def test_tool_execution_error_handling(self, mock_config):
+    def test_tool_execution_error_handling(self, generator_ro, make_tool_use_response):
         """Test that tool execution errors are caught and marked."""
-        with patch("ai_generator.anthropic.Anthropic"):
-            generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
+        response = make_tool_use_response("failing_tool", {}, "toolu_123")
+
+        tool_manager = _stub_tool_manager(side_effect=Exception("Tool error"))
+
+        results, had_error = asyncio.run(
+            generator_ro._execute_tools_from_response(response, tool_manager)
+        )
+
+        assert len(results) == 1
+        assert "Error" in results[0]["content"]
+        assert had_error is True
+
+
+@pytest.mark.unit
+class TestToolResult:
+    """Test the ToolResult record and its API block conversion."""
+
+    def test_success_block_shape(self):
+        """Test that successful results omit the is_error flag."""
+        block = ToolResult("toolu_1", "Result").to_block()
 
-            response = MagicMock()
-            mock_tool = MagicMock()
-            mock_tool.type = "tool_use"
-            mock_tool.id = "toolu_123"
-            mock_tool.name = "failing_tool"
-            mock_tool.input = {}
-            response.content = [mock_tool]
+        assert block == {"type": "tool_result", "tool_use_id": "toolu_1", "content": "Result"}
 
-            tool_manager = Mock()
-            tool_manager.execute_tool = Mock(side_effect=Exception("Tool error"))
+    def test_error_block_shape(self):
+        """Test that failed results are flagged for Claude."""
+        block = ToolResult("toolu_1", "Error executing tool: boom", is_error=True).to_block()
 
-            results, had_error = generator._execute_tools_from_response(response, tool_manager)
+        assert block["is_error"] is True
 
-            assert len(results) == 1
-            assert "Error" in results[0]["content"]
-            assert had_error is True
+    def test_uses_slots(self):
+        """Test that records carry no per-instance __dict__."""
+        assert not hasattr(ToolResult("toolu_1", "Result"), "__dict__")
 
 
 @pytest.mark.unit
 class TestForceFinalSynthesis:
     """Test the _force_final_synthesis helper method."""
 
-    def test_force_final_synthesis_calls_api(self, mock_config):
+    def test_force_final_synthesis_calls_api(self, mock_anthropic, mock_config):
         """Test that _force_final_synthesis makes an API call without tools."""
-        with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
-            mock_client = MagicMock()
+        mock_client = MagicMock()
 
-            final_response = MagicMock()
-            mock_content = MagicMock()
-            mock_content.text = "Here's my answer."
-            final_response.content = [mock_content]
+        final_response = MagicMock()
+        mock_content = MagicMock()
+        mock_content.text = "Here's my answer."
+        final_response.content = [mock_content]
 
-            mock_client.messages.create = Mock(return_value=final_response)
-            mock_anthropic.return_value = mock_client
+        mock_client.messages.create = AsyncMock(return_value=final_response)
+        mock_anthropic.return_value = mock_client
 
-            generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
-            generator.client = mock_client
+        generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
+        generator.client = mock_client
 
-            messages = [{"role": "user", "content": "Question"}]
-            system = "System prompt"
+        messages = [{"role": "user", "content": "Question"}]
+        system = "System prompt"
 
-            result = generator._force_final_synthesis(messages, system)
+        result = asyncio.run(generator._force_final_synthesis(messages, system))
 
-            # Verify API was called
-            mock_client.messages.create.assert_called_once()
-            call_args = mock_client.messages.create.call_args.kwargs
-            # Tools should NOT be in the call
-            assert "tools" not in call_args
-            assert "tool_choice" not in call_args
-            assert "answer" in result.lower()
+        # Verify API was called
+        mock_client.messages.create.assert_called_once()
+        kwargs = mock_client.messages.create.call_args.kwargs
+        # Tools should NOT be in the call
+        assert "tools" not in kwargs
+        assert "tool_choice" not in kwargs
+        assert "answer" in result.lower()
 
 
 @pytest.mark.unit
 class TestSystemPrompt:
     """Test system prompt handling."""
 
-    def test_system_prompt_contains_tool_instructions(self):
-        """Test that the system prompt contains tool usage instructions."""
-        assert "Search Tool Usage" in AIGenerator.SYSTEM_PROMPT
-        assert "Outline Tool Usage" in AIGenerator.SYSTEM_PROMPT
-
-    def test_system_prompt_contains_sequential_tool_instructions(self):
-        """Test that the system prompt mentions sequential tool calling."""
-        assert "Sequential Tool Calling" in AIGenerator.SYSTEM_PROMPT
-        assert "2 sequential tool calls" in AIGenerator.SYSTEM_PROMPT
-
-    def test_system_prompt_contains_response_protocol(self):
-        """Test that the system prompt contains response protocol."""
-        assert "Response Protocol" in AIGenerator.SYSTEM_PROMPT
-        assert "General knowledge questions" in AIGenerator.SYSTEM_PROMPT
-        assert "Course-specific questions" in AIGenerator.SYSTEM_PROMPT
+    @pytest.mark.parametrize(
+        "needle",
+        [
+            # Tool usage instructions
+            "Search Tool Usage",
+            "Outline Tool Usage",
+            # Sequential tool calling
+            "Sequential Tool Calling",
+            "2 sequential tool calls",
+            # Response protocol
+            "Response Protocol",
+            "General knowledge questions",
+            "Course-specific questions",
+            "No meta-commentary",
+        ],
+    )
+    def test_system_prompt_contains(self, needle):
+        """Test that the system prompt carries each required instruction."""
+        assert needle in AIGenerator.SYSTEM_PROMPT
 
     def test_system_prompt_emphasizes_brevity(self):
         """Test that the system prompt emphasizes brevity."""
         assert "Brief" in AIGenerator.SYSTEM_PROMPT or "Concise" in AIGenerator.SYSTEM_PROMPT
-        assert "No meta-commentary" in AIGenerator.SYSTEM_PROMPT
 
 
 @pytest.mark.unit
 class TestAIGeneratorErrors:
     """Test error handling in AIGenerator."""
 
-    def test_api_key_error_propagates(self, mock_config):
-        """Test that API key errors propagate up."""
-        with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
-            mock_client = MagicMock()
-            mock_client.messages.create = Mock(
-                side_effect=Exception("401 Unauthorized: Invalid API key")
+    @pytest.mark.parametrize(
+        "error_msg,match",
+        [
+            ("401 Unauthorized: Invalid API key", "401 Unauthorized"),
+            ("429 Too Many Requests", "Too Many Requests"),
+        ],
+        ids=["api_key", "rate_limit"],
+    )
+    def test_api_error_propagates(self, mock_anthropic, mock_config, error_msg, match):
+        """Test that API key and rate limit errors propagate up."""
+        mock_client = MagicMock()
+        mock_client.messages.create = AsyncMock(side_effect=Exception(error_msg))
+        mock_anthropic.return_value = mock_client
+
+        generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
+
+        with pytest.raises(Exception, match=match):
+            asyncio.run(generator.generate_response("Test query"))
+
+
+@pytest.mark.unit
+class TestResponseCache:
+    """Test memoization of tool-free answers."""
+
+    def test_repeated_query_served_from_cache(self, ai_generator_with_mock):
+        """Test that an identical request does not hit the API twice."""
+        first = asyncio.run(ai_generator_with_mock.generate_response("What is Python?"))
+        second = asyncio.run(ai_generator_with_mock.generate_response("What is Python?"))
+
+        assert first == second
+        assert ai_generator_with_mock.client.messages.create.call_count == 1
+
+    def test_different_history_is_a_cache_miss(self, ai_generator_with_mock):
+        """Test that conversation history is part of the cache key."""
+        asyncio.run(ai_generator_with_mock.generate_response("What is Python?"))
+        asyncio.run(
+            ai_generator_with_mock.generate_response(
+                "What is Python?", conversation_history="User: Hi\nAssistant: Hello"
+            )
+        )
+
+        assert ai_generator_with_mock.client.messages.create.call_count == 2
+
+    def test_tool_manager_is_part_of_cache_key(self, ai_generator_with_mock, tool_manager):
+        """Test that a tool-free answer is not reused for a request that can run tools."""
+        tools = tool_manager.get_tool_definitions()
+        asyncio.run(ai_generator_with_mock.generate_response("What is MCP?", tools=tools))
+        asyncio.run(
+            ai_generator_with_mock.generate_response(
+                "What is MCP?", tools=tools, tool_manager=tool_manager
             )
-            mock_anthropic.return_value = mock_client
+        )
+
+        assert ai_generator_with_mock.client.messages.create.call_count == 2
+        assert "tools" in ai_generator_with_mock.client.messages.create.call_args.kwargs
+
+    def test_tool_based_answers_are_not_cached(self, ai_generator_with_tool_use, tool_manager):
+        """Test that answers built from tool results are never memoized."""
+        tool_manager.execute_tool = Mock(return_value="Search results")
+
+        asyncio.run(
+            ai_generator_with_tool_use.generate_response(
+                "What is MCP?", tools=tool_manager.get_tool_definitions(), tool_manager=tool_manager
+            )
+        )
 
-            generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
-            generator.client = mock_client
+        assert len(ai_generator_with_tool_use.response_cache) == 0
 
-            # Should raise exception
-            with pytest.raises(Exception, match="401 Unauthorized"):
-                generator.generate_response("Test query")
+    def test_zero_size_disables_cache(self, mock_anthropic, mock_config, mock_anthropic_client):
+        """Test that a cache size of 0 turns memoization off."""
+        mock_anthropic.return_value = mock_anthropic_client
+        generator = AIGenerator(
+            mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL, response_cache_size=0
+        )
+
+        asyncio.run(generator.generate_response("What is Python?"))
+        asyncio.run(generator.generate_response("What is Python?"))
+
+        assert mock_anthropic_client.messages.create.call_count == 2
 
-    def test_rate_limit_error_propagates(self, mock_config):
-        """Test that rate limit errors propagate up."""
-        with patch("ai_generator.anthropic.Anthropic") as mock_anthropic:
-            mock_client = MagicMock()
-            mock_client.messages.create = Mock(side_effect=Exception("429 Too Many Requests"))
-            mock_anthropic.return_value = mock_client
 
-            generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
-            generator.client = mock_client
+@pytest.mark.unit
+class TestAsyncClient:
+    """Test that the generator awaits the AsyncAnthropic client."""
+
+    def test_generate_response_without_tools(self, ai_generator_with_mock):
+        """Test that the coroutine returns the text of the awaited response."""
+        result = asyncio.run(ai_generator_with_mock.generate_response("What is Python?"))
+
+        assert result == "This is a test response about MCP."
+        ai_generator_with_mock.client.messages.create.assert_awaited_once()
+
+    def test_tool_blocks_executed_in_order(
+        self, ai_generator_with_mock, tool_use_response, tool_manager
+    ):
+        """Test that concurrent tool execution keeps results aligned with tool_use blocks."""
+        second_block = MagicMock(type="tool_use", id="toolu_456", input={"course_name": "MCP"})
+        second_block.name = "get_course_outline"
+        # tool_use_response is shared across the session; extend a copy of its blocks
+        response = MagicMock(content=[*tool_use_response.content, second_block])
+        tool_manager.execute_tool = Mock(side_effect=lambda name, **kwargs: f"{name} result")
+
+        results, had_error = asyncio.run(
+            ai_generator_with_mock._execute_tools_from_response(response, tool_manager)
+        )
+
+        assert had_error is False
+        assert [r["tool_use_id"] for r in results] == ["toolu_123", "toolu_456"]
+        assert results[1]["content"] == "get_course_outline result"
+
+    def test_tool_error_forces_synthesis(
+        self, ai_generator_with_mock, tool_use_response, tool_manager
+    ):
+        """Test that a failing tool ends the loop with a tool-free synthesis call."""
+        client = ai_generator_with_mock.client
+        client.messages.create = AsyncMock(
+            side_effect=[
+                tool_use_response,
+                MagicMock(stop_reason="stop", content=[MagicMock(text="Fallback answer")]),
+            ]
+        )
+        tool_manager.execute_tool = Mock(side_effect=Exception("ChromaDB crash"))
+
+        result = asyncio.run(
+            ai_generator_with_mock.generate_response(
+                "What is MCP?", tools=tool_manager.get_tool_definitions(), tool_manager=tool_manager
+            )
+        )
 
-            with pytest.raises(Exception, match="Too Many Requests"):
-                generator.generate_response("Test query")
+        assert result == "Fallback answer"
+        assert "tools" not in client.messages.create.call_args.kwargs
 
 
 @pytest.mark.unit
-class TestExtractText:
-    """Test the _extract_text helper method."""
+class TestResponseText:
+    """Test how answer text is read from Claude responses."""
+
+    def test_text_read_from_first_block(self, ai_generator_with_mock):
+        """Test that the common single-text-block response is returned directly."""
+        result = asyncio.run(ai_generator_with_mock.generate_response("What is Python?"))
+
+        assert result == "This is a test response about MCP."
+
+    @staticmethod
+    def _thinking_response():
+        """End-turn response whose text block follows a thinking block."""
+        thinking = MagicMock(spec=["type", "thinking"])
+        thinking.type = "thinking"
+        text_block = MagicMock(type="text", text="Answer after thinking")
+        return MagicMock(stop_reason="end_turn", content=[thinking, text_block])
+
+    def test_leading_thinking_block_is_skipped(self, ai_generator_with_tool_use, tool_manager):
+        """Test that a thinking block ahead of the text does not hide the answer."""
+        ai_generator_with_tool_use.client.messages.create = AsyncMock(
+            return_value=self._thinking_response()
+        )
 
-    def test_extract_text_from_response(self, mock_config):
-        """Test extracting text from a Claude response."""
-        with patch("ai_generator.anthropic.Anthropic"):
-            generator = AIGenerator(mock_config.ANTHROPIC_API_KEY, mock_config.ANTHROPIC_MODEL)
+        result = asyncio.run(
+            ai_generator_with_tool_use.generate_response(
+                "What is MCP?", tools=tool_manager.get_tool_definitions(), tool_manager=tool_manager
+            )
+        )
+
+        assert result == "Answer after thinking"
 
-            response = MagicMock()
-            mock_content = MagicMock()
-            mock_content.text = "Test response text"
-            response.content = [mock_content]
+    def test_thinking_block_skipped_without_tools(self, ai_generator_with_mock):
+        """Test that the tool-free path also reads past a leading thinking block."""
+        ai_generator_with_mock.client.messages.create = AsyncMock(
+            return_value=self._thinking_response()
+        )
 
-            result = generator._extract_text(response)
-            assert result == "Test response text"
+        assert (
+            asyncio.run(ai_generator_with_mock.generate_response("What is MCP?"))
+            == "Answer after thinking"
+        )
@@ -13,7 +13,28 @@ Tests the execute method with various scenarios:
 import pytest
 from unittest.mock import Mock, patch
 from vector_store import SearchResults
-from search_tools import CourseSearchTool, CourseOutlineTool, ToolManager
+from search_tools import CourseSearchTool, CourseOutlineTool, Tool, ToolManager
+
+# Search results shared read-only by the tests that need them, built once at import
+_EMPTY_RESULTS = SearchResults(documents=[], metadata=[], distances=[], error=None)
+_SEARCH_ERROR = "Search error: ChromaDB connection failed"
+_ERROR_RESULTS = SearchResults(documents=[], metadata=[], distances=[], error=_SEARCH_ERROR)
+_LESSON_RESULTS = SearchResults(
+    documents=["Lesson content about servers"],
+    metadata=[{"course_title": "MCP: Build Rich-Context AI Apps", "lesson_number": 2}],
+    distances=[0.1],
+    error=None,
+)
+_BAD_LESSONS_CATALOG_RETURN = {
+    "metadatas": [
+        {
+            "title": "Test Course",
+            "course_link": "http://example.com",
+            "lessons_json": "invalid json{{{",
+            "lesson_count": 2,
+        }
+    ]
+}
 
 
 @pytest.mark.unit
@@ -34,82 +55,54 @@ class TestCourseSearchToolExecute:
         self, course_search_tool, mock_vector_store
     ):
         """Test that course_name parameter is passed to search method."""
-        # The search method should be called with course_name parameter
-        mock_vector_store.search.reset_mock()
-
         course_search_tool.execute(query="MCP", course_name="MCP")
 
         # Verify search was called with course_name
-        call_args = mock_vector_store.search.call_args
-        assert call_args.kwargs["course_name"] == "MCP"
+        assert mock_vector_store.search_calls[-1]["course_name"] == "MCP"
 
     def test_query_with_lesson_number_filter(self, course_search_tool, mock_vector_store):
         """Test that lesson_number parameter is passed to search."""
         course_search_tool.execute(query="servers", lesson_number=2)
 
         # Verify search was called with lesson_number
-        call_args = mock_vector_store.search.call_args
-        assert call_args.kwargs["lesson_number"] == 2
-
-    def test_empty_results_returns_proper_message(self, mock_vector_store):
-        """Test that empty search results return appropriate message."""
-        # Configure mock to return empty results
-        mock_vector_store.search = Mock(
-            return_value=SearchResults(documents=[], metadata=[], distances=[], error=None)
-        )
-
-        tool = CourseSearchTool(mock_vector_store)
-        result = tool.execute(query="nonexistent topic")
-
-        assert "No relevant content found" in result
-
-    def test_empty_results_with_course_filter(self, mock_vector_store):
-        """Test empty results message includes course name when filtered."""
-        mock_vector_store.search = Mock(
-            return_value=SearchResults(documents=[], metadata=[], distances=[], error=None)
-        )
-
-        tool = CourseSearchTool(mock_vector_store)
-        result = tool.execute(query="topic", course_name="Some Course")
-
-        assert "No relevant content found" in result
-        assert "Some Course" in result
-
-    def test_empty_results_with_lesson_filter(self, mock_vector_store):
-        """Test empty results message includes lesson number when filtered."""
-        mock_vector_store.search = Mock(
-            return_value=SearchResults(documents=[], metadata=[], distances=[], error=None)
-        )
-
-        tool = CourseSearchTool(mock_vector_store)
-        result = tool.execute(query="topic", lesson_number=5)
-
-        assert "No relevant content found" in result
-        assert "lesson 5" in result
-
-    def test_vector_store_error_is_propagated(self, mock_vector_store):
+        assert mock_vector_store.search_calls[-1]["lesson_number"] == 2
+
+    @pytest.mark.parametrize(
+        "kwargs,expected",
+        [
+            ({}, ["No relevant content found"]),
+            # Message includes the course name when filtered
+            ({"course_name": "Some Course"}, ["No relevant content found", "Some Course"]),
+            # Message includes the lesson number when filtered
+            ({"lesson_number": 5}, ["No relevant content found", "lesson 5"]),
+        ],
+        ids=["no_filter", "course_filter", "lesson_filter"],
+    )
+    def test_empty_results(self, course_search_tool, mock_vector_store, kwargs, expected):
+        """Test that empty search results return an appropriate message."""
+        mock_vector_store.search_results = _EMPTY_RESULTS
+
+        result = course_search_tool.execute(query="topic", **kwargs)
+
+        for text in expected:
+            assert text in result
+
+    def test_vector_store_error_is_propagated(self, course_search_tool, mock_vector_store):
         """Test that vector store errors are returned in the result."""
-        error_msg = "Search error: ChromaDB connection failed"
-        mock_vector_store.search = Mock(
-            return_value=SearchResults(documents=[], metadata=[], distances=[], error=error_msg)
-        )
+        mock_vector_store.search_results = _ERROR_RESULTS
 
-        tool = CourseSearchTool(mock_vector_store)
-        result = tool.execute(query="test")
+        result = course_search_tool.execute(query="test")
 
-        assert error_msg in result
+        assert _SEARCH_ERROR in result
 
-    def test_course_not_found_error(self, mock_vector_store):
+    def test_course_not_found_error(self, course_search_tool, mock_vector_store):
         """Test that non-existent course returns appropriate error."""
         # Configure _resolve_course_name to return None (not found)
-        mock_vector_store._resolve_course_name.return_value = None
+        mock_vector_store.resolved_title = None
         # Make search return empty results
-        mock_vector_store.search.return_value = SearchResults(
-            documents=[], metadata=[], distances=[], error=None
-        )
+        mock_vector_store.search_results = _EMPTY_RESULTS
 
-        tool = CourseSearchTool(mock_vector_store)
-        result = tool.execute(query="test", course_name="NonExistent Course")
+        result = course_search_tool.execute(query="test", course_name="NonExistent Course")
 
         # When _resolve_course_name returns None, search returns empty SearchResults
         # which formats as "No relevant content found"
@@ -120,10 +113,9 @@ class TestCourseSearchToolExecute:
 class TestCourseSearchToolFormatResults:
     """Test the _format_results method of CourseSearchTool."""
 
-    def test_format_results_structure(self, mock_vector_store, sample_search_results):
+    def test_format_results_structure(self, course_search_tool, sample_search_results):
         """Test that _format_results produces correct structure."""
-        tool = CourseSearchTool(mock_vector_store)
-        result = tool._format_results(sample_search_results)
+        result, _ = course_search_tool._format_results(sample_search_results)
 
         # Should contain course title header
         assert "[" in result
@@ -131,31 +123,51 @@ class TestCourseSearchToolFormatResults:
         # Should contain document content
         assert "MCP is a protocol" in result or "provides context" in result
 
-    def test_format_results_updates_last_sources(self, mock_vector_store, sample_search_results):
-        """Test that _format_results populates last_sources."""
-        tool = CourseSearchTool(mock_vector_store)
-        assert len(tool.last_sources) == 0
-
-        tool._format_results(sample_search_results)
+    def test_format_results_returns_sources(self, course_search_tool, sample_search_results):
+        """Test that _format_results returns the sources without storing them on the tool."""
+        _, sources = course_search_tool._format_results(sample_search_results)
 
-        # last_sources should be populated
-        assert len(tool.last_sources) > 0
+        assert len(sources) > 0
         # Each source should have 'text' and 'url' keys
-        for source in tool.last_sources:
+        for source in sources:
             assert "text" in source
             assert "url" in source
+        assert course_search_tool.last_sources == []
 
-    def test_format_results_with_lesson_metadata(self, mock_vector_store):
-        """Test formatting results with lesson number in metadata."""
-        results_with_lesson = SearchResults(
-            documents=["Lesson content about servers"],
-            metadata=[{"course_title": "MCP: Build Rich-Context AI Apps", "lesson_number": 2}],
-            distances=[0.1],
-            error=None,
-        )
+    def test_execute_updates_last_sources(self, course_search_tool):
+        """Test that execute keeps the returned sources in last_sources."""
+        _, sources = course_search_tool.execute_with_sources(query="What is MCP?")
+
+        course_search_tool.execute(query="What is MCP?")
+
+        assert course_search_tool.last_sources == sources
+
+    def test_format_results_fetches_links_in_one_call(
+        self, course_search_tool, mock_vector_store, sample_search_results
+    ):
+        """Test that source links for all results come from a single bulk lookup."""
+        course_search_tool._format_results(sample_search_results)
+
+        mock_vector_store.get_links_bulk.assert_called_once()
+        mock_vector_store.get_lesson_link.assert_not_called()
+        mock_vector_store.get_course_link.assert_not_called()
+
+    def test_format_results_without_lesson_number(
+        self, course_search_tool, mutable_sample_search_results
+    ):
+        """Test that chunks without a lesson number get a course-only header."""
+        for meta in mutable_sample_search_results.metadata:
+            del meta["lesson_number"]
+
+        result, sources = course_search_tool._format_results(mutable_sample_search_results)
 
-        tool = CourseSearchTool(mock_vector_store)
-        result = tool._format_results(results_with_lesson)
+        course_title = mutable_sample_search_results.metadata[0]["course_title"]
+        assert "Lesson" not in result
+        assert sources[0]["text"] == course_title
+
+    def test_format_results_with_lesson_metadata(self, course_search_tool):
+        """Test formatting results with lesson number in metadata."""
+        result, _ = course_search_tool._format_results(_LESSON_RESULTS)
 
         # Should show lesson number in the header
         assert "Lesson 2" in result
@@ -186,7 +198,7 @@ class TestCourseOutlineTool:
 
     def test_get_outline_nonexistent_course(self, course_outline_tool, mock_vector_store):
         """Test outline request for non-existent course."""
-        mock_vector_store._resolve_course_name = Mock(return_value=None)
+        mock_vector_store.resolved_title = None
 
         result = course_outline_tool.execute(course_name="NonExistent")
 
@@ -197,35 +209,39 @@ class TestCourseOutlineTool:
         course_outline_tool.execute(course_name="MCP")
 
         # Verify _resolve_course_name was called
-        mock_vector_store._resolve_course_name.assert_called_once_with("MCP")
+        assert mock_vector_store.resolve_calls == ["MCP"]
+
+    def test_outline_cached_per_course(self, course_outline_tool, mock_vector_store):
+        """Test that repeated outline requests reuse the parsed catalog entry."""
+        first = course_outline_tool.execute(course_name="MCP")
+        second = course_outline_tool.execute(course_name="MCP")
+
+        assert first == second
+        mock_vector_store.course_catalog.get.assert_called_once()
+
+    def test_clear_cache_refetches_outline(self, course_outline_tool, mock_vector_store):
+        """Test that clearing the cache makes the next request read the catalog again."""
+        course_outline_tool.execute(course_name="MCP")
+        course_outline_tool.clear_cache()
+        course_outline_tool.execute(course_name="MCP")
+
+        assert mock_vector_store.course_catalog.get.call_count == 2
 
 
 @pytest.mark.unit
 class TestToolManager:
     """Test the ToolManager class."""
 
-    def test_register_tool(self, mock_vector_store):
+    def test_register_tool(self, tool_manager, course_search_tool):
         """Test registering a tool."""
-        manager = ToolManager()
-        tool = CourseSearchTool(mock_vector_store)
+        assert "search_course_content" in tool_manager.tools
+        assert tool_manager.tools["search_course_content"] is course_search_tool
 
-        manager.register_tool(tool)
-
-        assert "search_course_content" in manager.tools
-        assert manager.tools["search_course_content"] is tool
-
-    def test_register_multiple_tools(self, mock_vector_store):
+    def test_register_multiple_tools(self, tool_manager, course_outline_tool):
         """Test registering multiple tools."""
-        manager = ToolManager()
-        search_tool = CourseSearchTool(mock_vector_store)
-        outline_tool = CourseOutlineTool(mock_vector_store)
-
-        manager.register_tool(search_tool)
-        manager.register_tool(outline_tool)
-
-        assert len(manager.tools) == 2
-        assert "search_course_content" in manager.tools
-        assert "get_course_outline" in manager.tools
+        assert len(tool_manager.tools) == 2
+        assert "search_course_content" in tool_manager.tools
+        assert tool_manager.tools["get_course_outline"] is course_outline_tool
 
     def test_get_tool_definitions(self, tool_manager):
         """Test getting tool definitions."""
@@ -239,6 +255,27 @@ class TestToolManager:
             assert "description" in definition
             assert "input_schema" in definition
 
+    def test_tool_definitions_cached_until_registration(self, mock_vector_store):
+        """Test that definitions are built once and rebuilt after a new registration."""
+        manager = ToolManager()
+        manager.register_tool(CourseSearchTool(mock_vector_store))
+
+        first = manager.get_tool_definitions()
+        assert manager.get_tool_definitions() is first
+
+        manager.register_tool(CourseOutlineTool(mock_vector_store))
+        second = manager.get_tool_definitions()
+
+        assert second is not first
+        assert [d["name"] for d in second] == ["search_course_content", "get_course_outline"]
+
+    def test_last_tool_definition_has_cache_breakpoint(self, tool_manager):
+        """Test that only the last definition is marked for prompt caching."""
+        definitions = tool_manager.get_tool_definitions()
+
+        assert definitions[-1]["cache_control"] == {"type": "ephemeral"}
+        assert all("cache_control" not in d for d in definitions[:-1])
+
     def test_execute_tool_success(self, tool_manager):
         """Test executing a registered tool."""
         # Mock the tool's execute method
@@ -255,37 +292,73 @@ class TestToolManager:
 
         assert "not found" in result.lower()
 
-    def test_get_last_sources(self, mock_vector_store):
+    def test_get_last_sources(self, tool_manager, course_search_tool):
         """Test getting sources from last search."""
-        manager = ToolManager()
-        search_tool = CourseSearchTool(mock_vector_store)
-
-        # Simulate a search that populates last_sources
-        search_tool.last_sources = [{"text": "Test Course", "url": "http://example.com"}]
+        # Simulate a search that populates last_sources (cleared again after the test)
+        course_search_tool.last_sources = [{"text": "Test Course", "url": "http://example.com"}]
 
-        manager.register_tool(search_tool)
-        sources = manager.get_last_sources()
+        sources = tool_manager.get_last_sources()
 
         assert len(sources) == 1
         assert sources[0]["text"] == "Test Course"
 
-    def test_reset_sources(self, mock_vector_store):
+    def test_reset_sources(self, tool_manager, course_search_tool):
         """Test resetting sources from all tools."""
+        course_search_tool.last_sources = [{"text": "Test", "url": "http://example.com"}]
+
+        tool_manager.reset_sources()
+
+        assert len(course_search_tool.last_sources) == 0
+
+    def test_request_view_keeps_its_own_sources(self, tool_manager, course_search_tool):
+        """Test that a for_request view records sources without touching the shared tool."""
+        view = tool_manager.for_request()
+
+        view.execute_tool("search_course_content", query="What is MCP?")
+
+        assert view.get_last_sources()
+        assert course_search_tool.last_sources == []
+        assert tool_manager.for_request().get_last_sources() == []
+
+        view.reset_sources()
+        assert view.get_last_sources() == []
+
+    def test_request_view_shares_cached_definitions(self, tool_manager):
+        """Test that a for_request view reuses the manager's built definitions."""
+        definitions = tool_manager.get_tool_definitions()
+
+        assert tool_manager.for_request().get_tool_definitions() is definitions
+
+    def test_only_source_tracking_tools_are_reset(self, mock_vector_store):
+        """Test that reset_sources touches only tools that declare tracks_sources."""
         manager = ToolManager()
-        search_tool = CourseSearchTool(mock_vector_store)
-        search_tool.last_sources = [{"text": "Test", "url": "http://example.com"}]
+        outline_tool = CourseOutlineTool(mock_vector_store)
+        outline_tool.last_sources = ["untouched"]
+        manager.register_tool(outline_tool)
 
-        manager.register_tool(search_tool)
         manager.reset_sources()
 
-        assert len(search_tool.last_sources) == 0
+        assert CourseSearchTool.tracks_sources is True
+        assert outline_tool.last_sources == ["untouched"]
+
+    def test_reregistered_search_tool_replaces_source_tracking(self, mock_vector_store):
+        """Test that re-registering a tool name drops the old tool's sources."""
+        manager = ToolManager()
+        old_tool = CourseSearchTool(mock_vector_store)
+        old_tool.last_sources = [{"text": "Old", "url": None}]
+        manager.register_tool(old_tool)
+
+        manager.register_tool(CourseSearchTool(mock_vector_store))
+
+        assert manager.get_last_sources() == []
 
     def test_tool_without_last_sources_attribute(self, mock_vector_store):
         """Test get_last_sources when tool doesn't have last_sources."""
         manager = ToolManager()
 
-        # Create a mock tool without last_sources
-        mock_tool = Mock()
+        # A spec'd Tool mock has no last_sources and tracks none
+        mock_tool = Mock(spec=Tool)
+        mock_tool.tracks_sources = False
         mock_tool.get_tool_definition = Mock(
             return_value={
                 "name": "mock_tool",
@@ -293,7 +366,6 @@ class TestToolManager:
                 "input_schema": {"type": "object"},
             }
         )
-        del mock_tool.last_sources  # Remove last_sources attribute
 
         manager.register_tool(mock_tool)
         sources = manager.get_last_sources()
@@ -336,36 +408,21 @@ class TestToolDefinitions:
 class TestToolErrorHandling:
     """Test error handling in tools."""
 
-    def test_search_tool_handles_chromadb_exception(self, mock_vector_store):
+    def test_search_tool_handles_chromadb_exception(self, course_search_tool, mock_vector_store):
         """Test that search tool does NOT catch ChromaDB exceptions - they propagate."""
         # Make search raise an exception
-        mock_vector_store.search = Mock(side_effect=Exception("ChromaDB crash"))
+        mock_vector_store.search_error = Exception("ChromaDB crash")
 
-        tool = CourseSearchTool(mock_vector_store)
         # The exception will propagate up - this is a potential cause of "query failed"
         with pytest.raises(Exception, match="ChromaDB crash"):
-            tool.execute(query="test")
+            course_search_tool.execute(query="test")
 
-    def test_outline_tool_handles_json_parse_error(self, mock_vector_store):
+    def test_outline_tool_handles_json_parse_error(self, course_outline_tool, mock_vector_store):
         """Test that outline tool handles invalid JSON in lessons."""
-        mock_vector_store._resolve_course_name = Mock(return_value="Test Course")
-        mock_catalog = Mock()
-        mock_catalog.get = Mock(
-            return_value={
-                "metadatas": [
-                    {
-                        "title": "Test Course",
-                        "course_link": "http://example.com",
-                        "lessons_json": "invalid json{{{",
-                        "lesson_count": 2,
-                    }
-                ]
-            }
-        )
-        mock_vector_store.course_catalog = mock_catalog
+        mock_vector_store.resolved_title = "Test Course"
+        mock_vector_store.course_catalog.get.return_value = _BAD_LESSONS_CATALOG_RETURN
 
-        tool = CourseOutlineTool(mock_vector_store)
-        result = tool.execute(course_name="Test Course")
+        result = course_outline_tool.execute(course_name="Test Course")
 
         # Should handle JSON parse error
         assert "Error" in result or "error" in result
@@ -0,0 +1,23 @@
+"""
+Micro-benchmarks for CourseSearchTool in search_tools.py.
+
+Times _format_results and execute, which run on every RAG query, against the
+shared fake store. Deselected by the default run; select with
+`pytest -m benchmark -n0`.
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.benchmark(group="format")
+def test_format_results_bench(benchmark, course_search_tool, sample_search_results):
+    """Benchmark formatting prebuilt search results into text and sources."""
+    benchmark(course_search_tool._format_results, sample_search_results)
+
+
+@pytest.mark.benchmark(group="execute")
+def test_execute_bench(benchmark, course_search_tool):
+    """Benchmark a full execute call: search, formatting and source tracking."""
+    benchmark(course_search_tool.execute, query="MCP")
@@ -8,13 +8,98 @@ Tests the search functionality and metadata handling:
 - Metadata retrieval
 """
 
+import json
 import pytest
 import tempfile
 import shutil
 from pathlib import Path
-from unittest.mock import Mock, MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import Mock, MagicMock, create_autospec
+import vector_store
 from vector_store import VectorStore, SearchResults
 
+# Chroma query and catalog results shared read-only by the tests, built once at import
+_QUERY_RESULT_SINGLE = {
+    "documents": [["Test content"]],
+    "metadatas": [[{"course_title": "Test Course", "lesson_number": 1}]],
+    "distances": [[0.1]],
+}
+_LESSON_LINKS_JSON = json.dumps(
+    [
+        {"lesson_number": 0, "lesson_link": "link0"},
+        {"lesson_number": 1, "lesson_link": "link1"},
+    ]
+)
+_CATALOG_COURSE_LINK = {"metadatas": [{"course_link": "https://example.com/course"}]}
+_CATALOG_LESSON_LINKS = {"metadatas": [{"lessons_json": _LESSON_LINKS_JSON}]}
+_CATALOG_COURSE_WITH_LESSONS = {
+    "ids": ["Test Course"],
+    "metadatas": [
+        {"course_link": "https://example.com/course", "lessons_json": _LESSON_LINKS_JSON}
+    ],
+}
+_CATALOG_ALL_COURSES = {
+    "metadatas": [
+        {
+            "title": "Test Course",
+            "instructor": "Test Instructor",
+            "course_link": "https://example.com",
+            "lessons_json": json.dumps([{"lesson_number": 0, "lesson_title": "Intro"}]),
+            "lesson_count": 1,
+        }
+    ]
+}
+# Raised by the collection mocks in the error-path tests
+_DB_ERROR = RuntimeError("ChromaDB error")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def chroma_patches():
+    """Stub Chroma's client and embedding function once for the whole module."""
+    chromadb = vector_store.chromadb
+    client = MagicMock()
+    embedding_function = MagicMock()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(chromadb, "PersistentClient", client)
+        mp.setattr(
+            chromadb.utils.embedding_functions,
+            "SentenceTransformerEmbeddingFunction",
+            embedding_function,
+        )
+        yield SimpleNamespace(client=client, embedding_function=embedding_function)
+
+
+@pytest.fixture(autouse=True)
+def _reset_chroma_patches(chroma_patches):
+    """Forget what each test configured or called on the module-wide patches."""
+    yield
+    chroma_patches.client.reset_mock(return_value=True, side_effect=True)
+    chroma_patches.embedding_function.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture(scope="module")
+def _collections():
+    """Autospecced Chroma collections, built once per module; calls must match Chroma's API."""
+    from chromadb.api.models.Collection import Collection
+
+    return SimpleNamespace(
+        content=create_autospec(Collection, instance=True),
+        catalog=create_autospec(Collection, instance=True),
+    )
+
+
+@pytest.fixture
+def store(mock_config, _collections):
+    """VectorStore over the patched Chroma client, wired to the shared collection mocks."""
+    store = VectorStore(
+        chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
+    )
+    store.course_content = _collections.content
+    store.course_catalog = _collections.catalog
+    yield store
+    _collections.content.reset_mock(return_value=True, side_effect=True)
+    _collections.catalog.reset_mock(return_value=True, side_effect=True)
+
 
 @pytest.mark.unit
 class TestSearchResults:
@@ -45,469 +130,193 @@ class TestVectorStoreInit:
 
     def test_init_with_temp_path(self, mock_config):
         """Test initialization with a temporary path."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH,
-                embedding_model=mock_config.EMBEDDING_MODEL,
-                max_results=mock_config.MAX_RESULTS,
-            )
+        store = VectorStore(
+            chroma_path=mock_config.CHROMA_PATH,
+            embedding_model=mock_config.EMBEDDING_MODEL,
+            max_results=mock_config.MAX_RESULTS,
+        )
 
-            assert store.max_results == mock_config.MAX_RESULTS
+        assert store.max_results == mock_config.MAX_RESULTS
 
-    def test_init_creates_collections(self, mock_config):
+    def test_init_creates_collections(self, mock_config, chroma_patches):
         """Test that initialization creates the required collections."""
-        with patch("vector_store.chromadb.PersistentClient") as mock_client:
-            mock_chroma_client = MagicMock()
-            mock_client.return_value = mock_chroma_client
+        mock_chroma_client = chroma_patches.client.return_value
 
-            mock_collection = MagicMock()
-            mock_chroma_client.get_or_create_collection = Mock(return_value=mock_collection)
-
-            with patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ):
-                store = VectorStore(
-                    chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-                )
+        VectorStore(
+            chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
+        )
 
-                # Should create two collections
-                assert mock_chroma_client.get_or_create_collection.call_count == 2
+        # Should create two collections
+        assert mock_chroma_client.get_or_create_collection.call_count == 2
 
 
 @pytest.mark.unit
 class TestVectorStoreSearch:
     """Test VectorStore.search method."""
 
-    def test_search_with_query_only(self, mock_config):
+    def test_search_with_query_only(self, store):
         """Test search with just a query parameter."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            # Create a real SearchResults for the mock to return
-            mock_results = {
-                "documents": [["Test content"]],
-                "metadatas": [[{"course_title": "Test Course", "lesson_number": 1}]],
-                "distances": [[0.1]],
-            }
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_content = MagicMock()
-            store.course_content.query = Mock(return_value=mock_results)
-
-            results = store.search("test query")
-
-            assert results.is_empty() is False
-            assert len(results.documents) == 1
-
-    def test_search_with_course_filter(self, mock_config):
-        """Test search with course_name filter."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            mock_results = {
-                "documents": [["Test content"]],
-                "metadatas": [[{"course_title": "MCP Course", "lesson_number": 1}]],
-                "distances": [[0.1]],
-            }
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_content = MagicMock()
-            store.course_content.query = Mock(return_value=mock_results)
-
-            # Mock _resolve_course_name
-            store._resolve_course_name = Mock(return_value="MCP Course")
-
-            results = store.search("test query", course_name="MCP")
-
-            # Check that the filter was applied
-            call_kwargs = store.course_content.query.call_args.kwargs
-            assert "where" in call_kwargs
-            assert call_kwargs["where"]["course_title"] == "MCP Course"
-
-    def test_search_with_lesson_filter(self, mock_config):
-        """Test search with lesson_number filter."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            mock_results = {
-                "documents": [["Test content"]],
-                "metadatas": [[{"course_title": "Test Course", "lesson_number": 2}]],
-                "distances": [[0.1]],
-            }
+        store.course_content.query.return_value = _QUERY_RESULT_SINGLE
 
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_content = MagicMock()
-            store.course_content.query = Mock(return_value=mock_results)
+        results = store.search("test query")
 
-            results = store.search("test query", lesson_number=2)
-
-            # Check that the filter was applied
-            call_kwargs = store.course_content.query.call_args.kwargs
-            assert "where" in call_kwargs
-            assert call_kwargs["where"]["lesson_number"] == 2
-
-    def test_search_course_not_found(self, mock_config):
+        assert results.is_empty() is False
+        assert len(results.documents) == 1
+
+    @pytest.mark.parametrize(
+        "kwargs,expected_where",
+        [
+            ({"course_name": "MCP"}, {"course_title": "MCP Course"}),
+            ({"lesson_number": 2}, {"lesson_number": 2}),
+        ],
+        ids=["course_filter", "lesson_filter"],
+    )
+    def test_search_filters(self, store, kwargs, expected_where):
+        """Test that course_name and lesson_number become the query's where filter."""
+        store.course_content.query.return_value = _QUERY_RESULT_SINGLE
+        # Mock _resolve_course_name
+        store._resolve_course_name = Mock(return_value="MCP Course")
+
+        store.search("test query", **kwargs)
+
+        # Check that the filter was applied
+        assert store.course_content.query.call_args.kwargs["where"] == expected_where
+
+    def test_search_course_not_found(self, store):
         """Test search when course is not found."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            # Mock _resolve_course_name to return None
-            store._resolve_course_name = Mock(return_value=None)
+        # Mock _resolve_course_name to return None
+        store._resolve_course_name = Mock(return_value=None)
 
-            results = store.search("test query", course_name="NonExistent")
+        results = store.search("test query", course_name="NonExistent")
 
-            assert results.is_empty()
-            assert "No course found matching" in results.error
+        assert results.is_empty()
+        assert "No course found matching" in results.error
 
-    def test_search_with_limit(self, mock_config):
+    def test_search_with_limit(self, store):
         """Test search with custom limit."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            mock_results = {
-                "documents": [["Test content"]],
-                "metadatas": [[{"test": "value"}]],
-                "distances": [[0.1]],
-            }
+        store.course_content.query.return_value = _QUERY_RESULT_SINGLE
 
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH,
-                embedding_model=mock_config.EMBEDDING_MODEL,
-                max_results=5,
-            )
-            store.course_content = MagicMock()
-            store.course_content.query = Mock(return_value=mock_results)
+        store.search("test query", limit=3)
 
-            store.search("test query", limit=3)
+        # Check that custom limit was used
+        call_kwargs = store.course_content.query.call_args.kwargs
+        assert call_kwargs["n_results"] == 3
 
-            # Check that custom limit was used
-            call_kwargs = store.course_content.query.call_args.kwargs
-            assert call_kwargs["n_results"] == 3
-
-    def test_search_error_propagation(self, mock_config):
+    def test_search_error_propagation(self, store):
         """Test that search errors are caught and returned in SearchResults."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
+        store.course_content.query.side_effect = _DB_ERROR
 
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_content = MagicMock()
-            store.course_content.query = Mock(side_effect=Exception("ChromaDB error"))
+        results = store.search("test query")
 
-            results = store.search("test query")
-
-            assert results.error is not None
-            assert "ChromaDB error" in results.error
+        assert results.error is not None
+        assert str(_DB_ERROR) in results.error
 
 
 @pytest.mark.unit
 class TestVectorStoreResolveCourseName:
     """Test _resolve_course_name method."""
 
-    def test_resolve_course_name_found(self, mock_config):
-        """Test resolving a course name that exists."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            mock_results = {
-                "documents": [["some text"]],
-                "metadatas": [[{"title": "MCP: Build Rich-Context AI Apps"}]],
-                "distances": [[0.1]],
-            }
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_catalog = MagicMock()
-            store.course_catalog.query = Mock(return_value=mock_results)
-
-            result = store._resolve_course_name("MCP")
-
-            assert result == "MCP: Build Rich-Context AI Apps"
-
-    def test_resolve_course_name_not_found(self, mock_config):
-        """Test resolving a course name that doesn't exist."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
+    @pytest.mark.parametrize(
+        "query_behaviour,expected",
+        [
+            (
+                {
+                    "return_value": {
+                        "documents": [["some text"]],
+                        "metadatas": [[{"title": "MCP: Build Rich-Context AI Apps"}]],
+                        "distances": [[0.1]],
+                    }
+                },
+                "MCP: Build Rich-Context AI Apps",
             ),
-        ):
-
             # Empty results
-            mock_results = {"documents": [[]], "metadatas": [[]], "distances": [[]]}
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_catalog = MagicMock()
-            store.course_catalog.query = Mock(return_value=mock_results)
-
-            result = store._resolve_course_name("NonExistent")
-
-            assert result is None
-
-    def test_resolve_course_name_error_handling(self, mock_config):
-        """Test error handling in resolve course name."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
+            ({"return_value": {"documents": [[]], "metadatas": [[]], "distances": [[]]}}, None),
+            # Query errors are swallowed
+            ({"side_effect": _DB_ERROR}, None),
+        ],
+        ids=["found", "not_found", "error"],
+    )
+    def test_resolve_course_name(self, store, query_behaviour, expected):
+        """Test resolving a course name against the catalog."""
+        store.course_catalog.query.configure_mock(**query_behaviour)
 
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_catalog = MagicMock()
-            store.course_catalog.query = Mock(side_effect=Exception("Query error"))
-
-            result = store._resolve_course_name("Test")
-
-            assert result is None
+        assert store._resolve_course_name("MCP") == expected
 
 
 @pytest.mark.unit
 class TestVectorStoreBuildFilter:
     """Test _build_filter method."""
 
-    def test_build_filter_no_filters(self, mock_config):
-        """Test building filter with no constraints."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-
-            result = store._build_filter(None, None)
-            assert result is None
-
-    def test_build_filter_course_only(self, mock_config):
-        """Test building filter with course only."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-
-            result = store._build_filter("Test Course", None)
-            assert result == {"course_title": "Test Course"}
-
-    def test_build_filter_lesson_only(self, mock_config):
-        """Test building filter with lesson only."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-
-            result = store._build_filter(None, 5)
-            assert result == {"lesson_number": 5}
-
-    def test_build_filter_both(self, mock_config):
-        """Test building filter with both course and lesson."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-
-            result = store._build_filter("Test Course", 5)
-            assert result == {"$and": [{"course_title": "Test Course"}, {"lesson_number": 5}]}
+    @pytest.mark.parametrize(
+        "course,lesson,expected",
+        [
+            (None, None, None),
+            ("Test Course", None, {"course_title": "Test Course"}),
+            (None, 5, {"lesson_number": 5}),
+            ("Test Course", 5, {"$and": [{"course_title": "Test Course"}, {"lesson_number": 5}]}),
+        ],
+        ids=["no_filters", "course_only", "lesson_only", "both"],
+    )
+    def test_build_filter(self, store, course, lesson, expected):
+        """Test building the where filter from course and lesson constraints."""
+        assert store._build_filter(course, lesson) == expected
 
 
 @pytest.mark.unit
 class TestVectorStoreMetadata:
     """Test metadata retrieval methods."""
 
-    def test_get_course_link(self, mock_config):
+    def test_get_course_link(self, store):
         """Test getting course link."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
+        store.course_catalog.get.return_value = _CATALOG_COURSE_LINK
 
-            mock_results = {"metadatas": [{"course_link": "https://example.com/course"}]}
+        result = store.get_course_link("Test Course")
+        assert result == "https://example.com/course"
 
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_catalog = MagicMock()
-            store.course_catalog.get = Mock(return_value=mock_results)
-
-            result = store.get_course_link("Test Course")
-            assert result == "https://example.com/course"
-
-    def test_get_lesson_link(self, mock_config):
+    def test_get_lesson_link(self, store):
         """Test getting lesson link."""
-        import json
-
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            lessons = [
-                {"lesson_number": 0, "lesson_link": "link0"},
-                {"lesson_number": 1, "lesson_link": "link1"},
-            ]
+        store.course_catalog.get.return_value = _CATALOG_LESSON_LINKS
 
-            mock_results = {"metadatas": [{"lessons_json": json.dumps(lessons)}]}
+        result = store.get_lesson_link("Test Course", 1)
+        assert result == "link1"
 
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_catalog = MagicMock()
-            store.course_catalog.get = Mock(return_value=mock_results)
+    def test_get_links_bulk(self, store):
+        """Test resolving many source links with a single catalog lookup."""
+        store.course_catalog.get.return_value = _CATALOG_COURSE_WITH_LESSONS
 
-            result = store.get_lesson_link("Test Course", 1)
-            assert result == "link1"
-
-    def test_get_all_courses_metadata(self, mock_config):
-        """Test getting all courses metadata."""
-        import json
-
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            lessons = [{"lesson_number": 0, "lesson_title": "Intro"}]
-
-            mock_results = {
-                "metadatas": [
-                    {
-                        "title": "Test Course",
-                        "instructor": "Test Instructor",
-                        "course_link": "https://example.com",
-                        "lessons_json": json.dumps(lessons),
-                        "lesson_count": 1,
-                    }
-                ]
-            }
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_catalog = MagicMock()
-            store.course_catalog.get = Mock(return_value=mock_results)
+        result = store.get_links_bulk(
+            [("Test Course", 1), ("Test Course", 9), ("Test Course", None)]
+        )
 
-            result = store.get_all_courses_metadata()
+        store.course_catalog.get.assert_called_once_with(ids=["Test Course"])
+        assert result == {
+            ("Test Course", 1): "link1",
+            ("Test Course", 9): "https://example.com/course",
+            ("Test Course", None): "https://example.com/course",
+        }
 
-            assert len(result) == 1
-            assert result[0]["title"] == "Test Course"
-            assert "lessons" in result[0]
-            assert result[0]["lessons"][0]["lesson_title"] == "Intro"
+    def test_get_links_bulk_skips_missing_metadata(self, store):
+        """Test that a catalog entry without metadata leaves its keys unresolved."""
+        store.course_catalog.get.return_value = {"ids": ["Test Course"], "metadatas": [None]}
 
+        result = store.get_links_bulk([("Test Course", 1)])
 
-@pytest.mark.unit
-class TestVectorStoreErrors:
-    """Test error handling in VectorStore."""
-
-    def test_search_exception_returns_error_result(self, mock_config):
-        """Test that search exceptions are caught and returned as error."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
+        assert result == {("Test Course", 1): None}
 
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_content = MagicMock()
-            store.course_content.query = Mock(side_effect=Exception("Connection failed"))
+    def test_get_all_courses_metadata(self, store):
+        """Test getting all courses metadata."""
+        store.course_catalog.get.return_value = _CATALOG_ALL_COURSES
 
-            results = store.search("test query")
+        result = store.get_all_courses_metadata()
 
-            assert results.error is not None
-            assert "Connection failed" in results.error
+        assert len(result) == 1
+        assert result[0]["title"] == "Test Course"
+        assert "lessons" in result[0]
+        assert result[0]["lessons"][0]["lesson_title"] == "Intro"
 
-    def test_get_course_link_handles_errors(self, mock_config):
+    def test_get_course_link_handles_errors(self, store):
         """Test error handling in get_course_link."""
-        with (
-            patch("vector_store.chromadb.PersistentClient"),
-            patch(
-                "vector_store.chromadb.utils.embedding_functions.SentenceTransformerEmbeddingFunction"
-            ),
-        ):
-
-            store = VectorStore(
-                chroma_path=mock_config.CHROMA_PATH, embedding_model=mock_config.EMBEDDING_MODEL
-            )
-            store.course_catalog = MagicMock()
-            store.course_catalog.get = Mock(side_effect=Exception("DB error"))
+        store.course_catalog.get.side_effect = _DB_ERROR
 
-            result = store.get_course_link("Test Course")
-            assert result is None
+        result = store.get_course_link("Test Course")
+        assert result is None
@@ -1,9 +1,18 @@
 import chromadb
+import json
 from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from models import Course, CourseChunk
-from sentence_transformers import SentenceTransformer
+
+# lessons_json is parsed on every outline/link lookup; orjson (pulled in by chromadb)
+# is several times faster than the stdlib parser for these payloads
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 
 @dataclass
@@ -133,8 +142,6 @@ class VectorStore:
 
     def add_course_metadata(self, course: Course):
         """Add course information to the catalog for semantic search"""
-        import json
-
         course_text = course.title
 
         # Build lessons metadata and serialize as JSON string
@@ -217,8 +224,6 @@ class VectorStore:
 
     def get_all_courses_metadata(self) -> List[Dict[str, Any]]:
         """Get metadata for all courses in the vector store"""
-        import json
-
         try:
             results = self.course_catalog.get()
             if results and "metadatas" in results:
@@ -227,7 +232,7 @@ class VectorStore:
                 for metadata in results["metadatas"]:
                     course_meta = metadata.copy()
                     if "lessons_json" in course_meta:
-                        course_meta["lessons"] = json.loads(course_meta["lessons_json"])
+                        course_meta["lessons"] = json_loads(course_meta["lessons_json"])
                         del course_meta["lessons_json"]  # Remove the JSON string version
                     parsed_metadata.append(course_meta)
                 return parsed_metadata
@@ -251,8 +256,6 @@ class VectorStore:
 
     def get_lesson_link(self, course_title: str, lesson_number: int) -> Optional[str]:
         """Get lesson link for a given course title and lesson number"""
-        import json
-
         try:
             # Get course by ID (title is the ID)
             results = self.course_catalog.get(ids=[course_title])
@@ -260,7 +263,7 @@ class VectorStore:
                 metadata = results["metadatas"][0]
                 lessons_json = metadata.get("lessons_json")
                 if lessons_json:
-                    lessons = json.loads(lessons_json)
+                    lessons = json_loads(lessons_json)
                     # Find the lesson with matching number
                     for lesson in lessons:
                         if lesson.get("lesson_number") == lesson_number:
@@ -268,3 +271,44 @@ class VectorStore:
             return None
         except Exception as e:
             print(f"Error getting lesson link: {e}")
+
+    def get_links_bulk(
+        self, keys: List[Tuple[str, Optional[int]]]
+    ) -> Dict[Tuple[str, Optional[int]], Optional[str]]:
+        """
+        Resolve source links for many (course_title, lesson_number) pairs in one catalog lookup.
+
+        Each key maps to its lesson link when one exists, otherwise to the course link.
+        """
+        links: Dict[Tuple[str, Optional[int]], Optional[str]] = dict.fromkeys(keys)
+        titles = list(dict.fromkeys(title for title, _ in keys))
+        if not titles:
+            return links
+
+        try:
+            results = self.course_catalog.get(ids=titles)
+        except Exception as e:
+            print(f"Error getting links: {e}")
+            return links
+
+        course_links = {}
+        lesson_links = {}
+        for course_id, metadata in zip(
+            results.get("ids") or [], results.get("metadatas") or [], strict=True
+        ):
+            if metadata is None:
+                continue
+            course_links[course_id] = metadata.get("course_link")
+            lessons_json = metadata.get("lessons_json")
+            if lessons_json:
+                for lesson in json_loads(lessons_json):
+                    lesson_links[(course_id, lesson.get("lesson_number"))] = lesson.get(
+                        "lesson_link"
+                    )
+
+        for title, lesson_number in links:
+            url = None
+            if lesson_number is not None:
+                url = lesson_links.get((title, lesson_number))
+            links[(title, lesson_number)] = url or course_links.get(title)
+        return links